@@ -0,0 +1,127 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+from typing import Any, Callable, Dict
+
+# Workers mostly wait on the classifier's micro-batcher or run NumPy with the GIL released,
+# and enough of them must wait at once for the batcher to fill its batches
+DEFAULT_WORKERS: int = 8
+# Calls waiting for a worker before new ones are rejected. Routes await their calls without
+# holding a request thread, so the cap bounds queued work and latency, not threads.
+DEFAULT_MAX_QUEUE: int = 16
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when the compute executor's queue is full."""
+
+
+class ComputeExecutor:
+    """Bounded thread pool for model inference and ranking work.
+
+    Keeps CPU-heavy work off Starlette's shared request threads and caps how much of it
+    runs at once. Calls beyond max_workers running and max_queue waiting are rejected
+    with ExecutorSaturated instead of piling up behind each other, unless the caller
+    asks to wait for a free slot.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self.slot_freed = threading.Condition(self.lock)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, wait: bool = False) -> Future:
+        """Queue a call on the pool.
+
+        Args:
+            fn (Callable[..., Any]): The work to run.
+            *args (Any): Arguments passed to fn.
+            wait (bool): Block until the queue has room instead of rejecting the call. Defaults to False.
+
+        Returns:
+            Future: Resolves to fn's result.
+
+        Raises:
+            ExecutorSaturated: If max_workers calls are running, max_queue are waiting and wait is False.
+        """
+        with self.lock:
+            while self.pending >= self.max_workers + self.max_queue:
+                if not wait:
+                    self.rejected += 1
+                    raise ExecutorSaturated(f"Compute executor is saturated ({self.pending} calls pending)")
+                self.slot_freed.wait()
+            self.pending += 1
+
+        def task() -> Any:
+            with self.lock:
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self.lock:
+                    self.running -= 1
+                    self.pending -= 1
+                    self.completed += 1
+                    self.slot_freed.notify()
+
+        return self.executor.submit(task)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a call on the pool and await its result without holding a thread.
+
+        The call is queued, or rejected, before the first await, so a saturated pool
+        fails the request before anything is sent back.
+
+        Args:
+            fn (Callable[..., Any]): The work to run.
+            *args (Any): Arguments passed to fn.
+
+        Returns:
+            Any: fn's result.
+
+        Raises:
+            ExecutorSaturated: If the queue is full.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a call on the pool and block the calling thread until its result is ready.
+
+        A full queue is waited out rather than rejected, so work that was already admitted
+        elsewhere, such as a queued job, is never dropped here.
+
+        Args:
+            fn (Callable[..., Any]): The work to run.
+            *args (Any): Arguments passed to fn.
+
+        Returns:
+            Any: fn's result.
+        """
+        return self.submit(fn, *args, wait=True).result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and saturation of the pool.
+
+        Returns:
+            Dict[str, Any]: Workers, running and queued calls, queue limit, saturation
+            (pending calls over capacity), and completed and rejected counts.
+        """
+        with self.lock:
+            return {
+                "workers": self.max_workers,
+                "running": self.running,
+                "queued": self.pending - self.running,
+                "max_queue": self.max_queue,
+                "saturation": self.pending / (self.max_workers + self.max_queue),
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        """Finish the queued calls and stop the workers."""
+        self.executor.shutdown(wait=True)
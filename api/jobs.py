@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Any, Callable, Dict, Hashable
+import uuid
+
+# Finished jobs kept for status polling before the oldest are dropped
+MAX_FINISHED_JOBS = 1000
+# Queued and running jobs before new submissions are rejected
+MAX_PENDING_JOBS = 64
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when the job queue already holds max_pending unfinished jobs."""
+
+
+class JobQueue:
+    """Runs jobs on a bounded pool of worker threads and tracks their status.
+
+    Submitting a job whose key matches one that is still queued or running returns
+    the existing job instead of starting a second one. New jobs beyond max_pending
+    unfinished ones are rejected with JobQueueFull, so the executor's queue stays bounded.
+    """
+
+    def __init__(self, max_workers: int = 2, max_finished: int = MAX_FINISHED_JOBS, max_pending: int = MAX_PENDING_JOBS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="generate-job")
+        self.max_finished = max_finished
+        self.max_pending = max_pending
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.in_flight: Dict[Hashable, str] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> Dict[str, Any]:
+        """Queue a job, or return the in-flight job with the same key.
+
+        Args:
+            key (Hashable): Identifies identical submissions.
+            fn (Callable[..., Any]): The work to run.
+            *args (Any): Arguments passed to fn.
+
+        Returns:
+            Dict[str, Any]: The job's ID and status.
+
+        Raises:
+            JobQueueFull: If max_pending jobs are queued or running.
+        """
+        with self.lock:
+            if key in self.in_flight:
+                return self.status(self.in_flight[key])
+            if len(self.in_flight) >= self.max_pending:
+                raise JobQueueFull(f"Job queue is full ({len(self.in_flight)} jobs pending)")
+            job_id = str(uuid.uuid4())
+            self.jobs[job_id] = {"job_id": job_id, "status": "queued", "result": None, "error": None}
+            self.in_flight[key] = job_id
+        self.executor.submit(self._run, job_id, key, fn, *args)
+        return self.status(job_id)
+
+    def _run(self, job_id: str, key: Hashable, fn: Callable[..., Any], *args: Any) -> None:
+        job = self.jobs[job_id]
+        job["status"] = "running"
+        try:
+            job["result"] = fn(*args)
+            job["status"] = "done"
+        except Exception as e:
+            print(e)
+            job["error"] = str(e)
+            job["status"] = "failed"
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+                self._evict_finished()
+
+    def _evict_finished(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def status(self, job_id: str) -> Dict[str, Any] | None:
+        """Get a job's status and, once finished, its result or error.
+
+        Args:
+            job_id (str): Job ID.
+
+        Returns:
+            Dict[str, Any] | None: The job, or None if it is unknown or was evicted.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        return dict(job)
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs and wait for running ones."""
+        self.executor.shutdown(wait=True)
@@ -1,10 +1,13 @@
+import asyncio
 from contextlib import asynccontextmanager
+import os
 import pathlib
 import sys
 import certifi
 import dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pymongo import MongoClient
 import uvicorn
 import certifi
@@ -12,10 +15,18 @@ import certifi
 sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
 # FastAPI routes
 from api.user_routes import user_router
-from api.playlist_routes import playlist_router
+from api.playlist_routes import playlist_router, spotify_writer
 from api.track_routes import track_router
 from api.oauth_routes import oauth_router
+from api.jobs import JobQueue, JobQueueFull, MAX_PENDING_JOBS
+from api.compute_executor import ComputeExecutor, ExecutorSaturated, DEFAULT_WORKERS, DEFAULT_MAX_QUEUE
 from database.load_data import MONGO_URL
+from mood_estimators.catalog_index import CatalogIndex
+from mood_estimators.catalog_version import get_catalog_version
+from mood_estimators.vector_snapshot import load_snapshot, DEFAULT_SNAPSHOT_DIRECTORY
+from mood_estimators.ann_index import IVFIndex, DEFAULT_INDEX_PATH, DEFAULT_NPROBE
+from mood_estimators.model_registry import registry, EMOTION_MODEL, configure_emotion_batcher, configure_inference_backend
+from mood_estimators.prediction_cache import configure_prediction_cache, get_prediction_cache, DEFAULT_MAX_ENTRIES, DEFAULT_TTL_SECONDS
 
 # Load environment variables
 CONFIG = dotenv.dotenv_values("database/.env")
@@ -27,12 +38,123 @@ mongodb_client = MongoClient(uri,tlsCAFile=certifi.where())
 
 
 
+# How often the API checks whether the catalog changed since its index was loaded
+CATALOG_REFRESH_SECONDS: float = 60
+
+
+def load_catalog_index(database) -> CatalogIndex:
+    """
+    Load the catalog index for the current catalog version.
+
+    A current snapshot is memory-mapped, otherwise the vectors are pulled from MongoDB.
+    Large catalogs are ranked through the ANN index built by ann_index.py, if it matches.
+
+    Args:
+        database: The soundsmith database.
+
+    Returns:
+        CatalogIndex: The loaded index.
+    """
+    catalog_index = load_snapshot(CONFIG.get("SNAPSHOT_DIRECTORY", DEFAULT_SNAPSHOT_DIRECTORY))
+    if catalog_index is None or catalog_index.catalog_version != get_catalog_version(database):
+        catalog_index = CatalogIndex.from_db(database)
+    print(f"Loaded {len(catalog_index)} tracks of catalog version {catalog_index.catalog_version} into the catalog index!")
+
+    ann_path = CONFIG.get("ANN_INDEX_PATH", DEFAULT_INDEX_PATH)
+    if os.path.exists(ann_path):
+        nprobe = int(CONFIG.get("ANN_NPROBE", DEFAULT_NPROBE))
+        # ANN_FILL_K=false makes ANN_NPROBE a hard cap, even if that returns fewer tracks
+        fill_k = CONFIG.get("ANN_FILL_K", "true").lower() != "false"
+        catalog_index.attach_ann(IVFIndex.load(ann_path), nprobe, fill_k)
+    return catalog_index
+
+
+async def refresh_catalog_index(app: FastAPI, interval: float) -> None:
+    """
+    Swap in a new catalog index whenever the catalog version changes, e.g. after reset_songs_vector.
+
+    Requests already ranking keep the index they started with; the old index is not closed
+    but garbage-collected once the last of them lets go of it.
+
+    Args:
+        app (FastAPI): The application holding the index.
+        interval (float): Seconds between version checks.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            version = await loop.run_in_executor(None, get_catalog_version, app.database)
+            if version == app.state.catalog_index.catalog_version:
+                continue
+            print(f"Catalog changed to version {version}, reloading the catalog index")
+            # Requests still holding the old index keep ranking with it until they drop it
+            app.state.catalog_index = await loop.run_in_executor(None, load_catalog_index, app.database)
+        except Exception as e:
+            # Keep serving the loaded index and try again on the next check
+            print(f"Could not refresh the catalog index: {e}")
+
+
 # Handles startup and shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # INFERENCE_BACKEND=onnx serves the int8 ONNX Runtime models instead of PyTorch
+    configure_inference_backend(CONFIG.get("INFERENCE_BACKEND", os.environ.get("INFERENCE_BACKEND", "torch")))
+
+    # Concurrent generate requests share classifier forward passes
+    configure_emotion_batcher(
+        int(CONFIG.get("CLASSIFIER_MAX_BATCH_SIZE", 16)),
+        float(CONFIG.get("CLASSIFIER_MAX_WAIT_MS", 5)),
+    )
+
+    # Repeated descriptions skip the classifier; set PREDICTION_CACHE_PATH to persist across restarts
+    configure_prediction_cache(
+        int(CONFIG.get("PREDICTION_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+        float(CONFIG.get("PREDICTION_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+        CONFIG.get("PREDICTION_CACHE_PATH"),
+    )
+
+    # Load and warm up the emotion classifier in the background; /ready reports when it is done or if it failed
+    app.state.warm_up_error = None
+    warm_up = asyncio.get_running_loop().run_in_executor(None, registry.warm_up, [EMOTION_MODEL])
+
+    def report_warm_up(future: asyncio.Future) -> None:
+        if future.cancelled() or future.exception() is None:
+            return
+        error = future.exception()
+        app.state.warm_up_error = f"{type(error).__name__}: {error}"
+        print(f"Warming up {EMOTION_MODEL} failed: {app.state.warm_up_error}")
+
+    warm_up.add_done_callback(report_warm_up)
+
+    # Load the catalog's mood vectors once so playlist generation ranks from memory,
+    # and reload them whenever the catalog version changes
+    app.state.catalog_index = load_catalog_index(app.database)
+    catalog_refresh = asyncio.create_task(
+        refresh_catalog_index(app, float(CONFIG.get("CATALOG_REFRESH_SECONDS", CATALOG_REFRESH_SECONDS)))
+    )
+
+    # Classification and ranking run on their own bounded pool, away from the request threads
+    app.state.compute_executor = ComputeExecutor(
+        int(CONFIG.get("COMPUTE_WORKERS", DEFAULT_WORKERS)),
+        int(CONFIG.get("COMPUTE_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+    )
+
+    # Background workers for POST /playlists/generate?job=true, with a cap on unfinished jobs
+    app.state.job_queue = JobQueue(
+        int(CONFIG.get("GENERATE_WORKERS", 2)),
+        max_pending=int(CONFIG.get("GENERATE_MAX_PENDING", MAX_PENDING_JOBS)),
+    )
 
     # handles shutdown events
     yield
+    catalog_refresh.cancel()
+    app.state.job_queue.shutdown()
+    app.state.compute_executor.shutdown()
+    # Wait for a warm-up still running; a failure was already reported by report_warm_up
+    await asyncio.wait([warm_up])
+    app.state.catalog_index.close()
+    spotify_writer.close()
     mongodb_client.close()
     print("Disconnected from the MongoDB database!")
 
@@ -46,6 +168,82 @@ app.include_router(playlist_router)
 app.include_router(track_router)
 app.include_router(oauth_router)
 
+
+@app.exception_handler(ExecutorSaturated)
+def compute_saturated(request: Request, exc: ExecutorSaturated) -> JSONResponse:
+    """
+    Turn a full compute queue into 503 Service Unavailable, so clients back off and retry.
+
+    Args:
+        request (Request): The rejected request.
+        exc (ExecutorSaturated): The rejection.
+
+    Returns:
+        JSONResponse: The error response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(JobQueueFull)
+def job_queue_full(request: Request, exc: JobQueueFull) -> JSONResponse:
+    """
+    Turn a full job queue into 503 Service Unavailable, so clients back off and retry.
+
+    Args:
+        request (Request): The rejected request.
+        exc (JobQueueFull): The rejection.
+
+    Returns:
+        JSONResponse: The error response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.get("/ready", response_description="Readiness of the API")
+def ready() -> dict:
+    """
+    Report whether the API can serve playlist generation.
+
+    Returns:
+        dict: Readiness of the API.
+
+    Raises:
+        HTTPException: If the emotion classifier failed or has not finished warming up.
+    """
+    if app.state.warm_up_error is not None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Model warm-up failed: {app.state.warm_up_error}",
+        )
+    if not registry.is_ready(EMOTION_MODEL):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Models are still warming up",
+        )
+    return {"ready": True}
+
+
+@app.get("/stats", response_description="Runtime counters of the API")
+def stats() -> dict:
+    """
+    Report runtime counters, such as prediction cache hits and misses and compute queue depth.
+
+    Returns:
+        dict: Counters by component.
+    """
+    return {
+        "prediction_cache": get_prediction_cache().stats(),
+        "compute_executor": app.state.compute_executor.stats(),
+    }
+
 app.add_middleware(CORSMiddleware,allow_origins=["*"],allow_credentials=True,allow_methods=["*"],allow_headers=["*"])
 print("Connected to the MongoDB database!")
 
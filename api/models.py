@@ -140,3 +140,23 @@ class PlaylistGenerate(BaseModel):
                 "jwt": str(ObjectId()),
             }
         }
+
+
+class PlaylistBatchItem(BaseModel):
+    user_id: str
+    description: str
+
+
+class PlaylistGenerateBatch(BaseModel):
+    requests: List[PlaylistBatchItem]
+
+    class Config:
+        populate_by_name = True
+        json_schema_extra = {
+            "example": {
+                "requests": [
+                    {"user_id": str(ObjectId()), "description": "chill study vibes"},
+                    {"user_id": str(ObjectId()), "description": "sad rainy day"},
+                ],
+            }
+        }
@@ -1,16 +1,19 @@
 import token
-from typing import Dict
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Tuple
 from fastapi import APIRouter, Request, HTTPException, status
 from fastapi.encoders import jsonable_encoder
 import sys
 import pathlib
-from transformers import pipeline
 from mood_estimators import song_details_calc
+from mood_estimators.batch_generate import generate_batch
+from mood_estimators.model_registry import get_emotion_classifier
+from mood_estimators import playlist_pipeline
 from spotipy import oauth2, Spotify
 from dotenv import load_dotenv
 import json
 from fastapi import APIRouter, Request, Response, WebSocket, FastAPI, HTTPException
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse
 from requests import request
 from spotipy import oauth2, Spotify
 import dotenv
@@ -24,7 +27,9 @@ from database.load_data import load_playlists
 
 
 sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
-from api.models import GetPlaylist, Playlist, PlaylistGenerate
+from api.compute_executor import ComputeExecutor, ExecutorSaturated
+from api.spotify_writer import SpotifyWriter, DEFAULT_API_PREFIX, DEFAULT_MAX_WORKERS
+from api.models import GetPlaylist, Playlist, PlaylistGenerate, PlaylistGenerateBatch
 from database.crud import (
     create_playlist,
     delete_playlist,
@@ -34,6 +39,9 @@ from database.crud import (
 
 CONFIG = dotenv.dotenv_values("spotify_data_retrival/.env")
 
+# Write intermediate predictions and tracks to JSON files for debugging
+DEBUG_DUMP = CONFIG.get("DEBUG_DUMP", "false").lower() == "true"
+
 oauth_router = APIRouter(prefix="/oauth", tags=["oauth"])
 sp_oauth = oauth2.SpotifyOAuth(
     CONFIG.get("SPOTIFY_CLIENT_ID"),
@@ -43,6 +51,12 @@ sp_oauth = oauth2.SpotifyOAuth(
     cache_path=CONFIG.get("SPOTIFY_CACHE_PATH"),
 )
 
+# Shared by every generate request; SPOTIFY_API_PREFIX can point at a local fake server
+spotify_writer = SpotifyWriter(
+    CONFIG.get("SPOTIFY_API_PREFIX", DEFAULT_API_PREFIX),
+    int(CONFIG.get("SPOTIFY_WRITE_WORKERS", DEFAULT_MAX_WORKERS)),
+)
+
 playlist_router = APIRouter(prefix="/playlists", tags=["playlists"])
 
 
@@ -137,90 +151,232 @@ def delete_playlist_by_id(playlist_id: str, request: Request) -> None:
     delete_playlist(playlist_id, request.app.database)
 
 
+async def generate_events(description: str, index, executor: ComputeExecutor, wait: bool = False) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Run the generate pipeline stage by stage, yielding an event after each one.
+
+    Args:
+        description (str): The playlist description.
+        index (CatalogIndex): The in-memory catalog to rank against.
+        executor (ComputeExecutor): Runs classification and ranking.
+        wait (bool): Wait for a free compute slot instead of failing when the executor is saturated.
+            Only for job threads, which own their event loop. Defaults to False.
+
+    Yields:
+        Tuple[str, Dict]: The finished stage (classified, scored, playlist_created or tracks_added) and its results.
+
+    Raises:
+        ExecutorSaturated: If the compute executor cannot take the classification or ranking and wait is False.
+    """
+    async def compute(fn: Callable[..., Any], *args: Any) -> Any:
+        if wait:
+            # Blocks the job thread's private loop, which has nothing else to run meanwhile
+            return executor.call(fn, *args)
+        return await executor.run(fn, *args)
+
+    # Classify, map to quadrants and rank in memory on the compute executor, awaiting without a thread
+    emotion_predictions = await compute(playlist_pipeline.classify_description, description)
+    yield "classified", {"emotions": emotion_predictions}
+
+    emotions_predict, tracks = await compute(playlist_pipeline.rank_emotions, emotion_predictions, index)
+    print(emotions_predict)
+    if DEBUG_DUMP:
+        playlist_pipeline.dump_debug(emotion_predictions, tracks)
+    yield "scored", {"group": emotions_predict, "tracks": tracks}
+
+    # Create the playlist on Spotify and add the tracks in 100-item chunks; the HTTP calls block, so run them in a thread
+    token = await asyncio.to_thread(sp_oauth.get_access_token, as_dict=False)
+    playlist_id = await asyncio.to_thread(spotify_writer.create_playlist, token, "SoundSmith Playlist", description)
+    yield "playlist_created", {"playlist_id": playlist_id}
+
+    await asyncio.to_thread(spotify_writer.add_tracks, token, playlist_id, [track['track_id'] for track in tracks])
+    print(f"Playlist 'SoundSmith Playlist' created with ID: {playlist_id}")
+    yield "tracks_added", {"playlist_id": playlist_id, "count": len(tracks)}
+
+
+def format_event(event: str, data: Dict) -> str:
+    """
+    Format one Server-Sent Event.
+
+    Args:
+        event (str): The event name.
+        data (Dict): The event payload, sent as JSON.
+
+    Returns:
+        str: The event in text/event-stream format.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def run_generate(description: str, index, executor: ComputeExecutor, wait: bool = False) -> Dict:
+    """
+    Run the whole generate pipeline: classify, rank and write the playlist to Spotify.
+
+    Args:
+        description (str): The playlist description.
+        index (CatalogIndex): The in-memory catalog to rank against.
+        executor (ComputeExecutor): Runs classification and ranking.
+        wait (bool): Wait for a free compute slot instead of failing on a saturated executor. Defaults to False.
+
+    Returns:
+        Dict: A dictionary containing the generated tracks for the playlist.
+    """
+    results = {event: data async for event, data in generate_events(description, index, executor, wait)}
+    return {'tracks': results["scored"]["tracks"]}
+
+
+def run_generate_job(description: str, index, executor: ComputeExecutor) -> Dict:
+    """
+    Run the generate pipeline from a job worker thread, on that thread's own event loop.
+
+    The job queue already bounded the work when the job was accepted, so the job waits
+    for compute slots instead of failing on a saturated executor.
+
+    Args:
+        description (str): The playlist description.
+        index (CatalogIndex): The in-memory catalog to rank against.
+        executor (ComputeExecutor): Runs classification and ranking.
+
+    Returns:
+        Dict: A dictionary containing the generated tracks for the playlist.
+    """
+    return asyncio.run(run_generate(description, index, executor, wait=True))
+
 @playlist_router.post(
     "/generate",
     response_description="Generate a new playlist with AI",
 )
-def generate_playlist(playlist: PlaylistGenerate) -> Dict:
-    # Initialize the text classification pipeline
-    classifier = pipeline(task="text-classification", model="SamLowe/roberta-base-go_emotions", top_k=None)
-
+async def generate_playlist(playlist: PlaylistGenerate, request: Request, response: Response, job: bool = False) -> Dict:
     """
     Generate a new playlist with AI based on the provided PlaylistGenerate object.
 
     Args:
         playlist (PlaylistGenerate): The PlaylistGenerate object containing the description.
+        request (Request): The request object containing the application catalog index, compute executor and job queue.
+        response (Response): The response object, set to 202 Accepted in job mode.
+        job (bool): Queue the generation and return a job ID at once instead of waiting for the result.
 
     Returns:
-        Dict: A dictionary containing the generated tracks for the playlist.
+        Dict: A dictionary containing the generated tracks for the playlist, or the queued job in job mode.
     """
+    if job:
+        # Identical in-flight submissions share one job
+        queued = request.app.state.job_queue.submit(
+            (playlist.jwt, playlist.description),
+            run_generate_job,
+            playlist.description,
+            request.app.state.catalog_index,
+            request.app.state.compute_executor,
+        )
+        response.status_code = status.HTTP_202_ACCEPTED
+        return queued
 
-    # Classify emotions for the given sentence
-    predictions = classifier(playlist.description)
+    return await run_generate(playlist.description, request.app.state.catalog_index, request.app.state.compute_executor)
 
-    # Extract the emotion labels and scores from the predictions
-    emotion_labels = [emotion['label'] for emotion in predictions[0]]
-    emotion_scores = [emotion['score'] for emotion in predictions[0]]
+@playlist_router.get(
+    "/generate/stream",
+    response_description="Generate a new playlist with AI, streaming progress as Server-Sent Events",
+)
+async def generate_playlist_stream(description: str, request: Request) -> StreamingResponse:
+    """
+    Generate a new playlist with AI and stream an event after each stage.
 
-    # Combine emotion labels and scores into a dictionary
-    emotion_predictions = dict(zip(emotion_labels, emotion_scores))
+    Events are classified (emotion scores), scored (emotion group and tracks), playlist_created
+    (Spotify playlist ID) and tracks_added, then done with the same result as POST /playlists/generate.
+    Classification finishes before the stream opens, so a saturated compute executor is rejected
+    with 503. A stage failing after that ends the stream with an error event.
 
-    # Write the emotion predictions to a JSON file
-    output_file_emotion = "mood_estimators/emotion_predictions.json"
-    with open(output_file_emotion, 'w') as f:
-        json.dump(emotion_predictions, f, indent=4)
+    Args:
+        description (str): The playlist description.
+        request (Request): The request object containing the application catalog index and compute executor.
 
-    print("Emotion predictions have been saved to", output_file_emotion)
-    
-    # Import emotion predictions
-    emotions_predict = song_details_calc.import_emotions_predict('mood_estimators/emotion_predictions.json')
-    print(emotions_predict)
-    
-    # Generate tracks based on emotion predictions
-    tracks = song_details_calc.main(emotions_predict)
-    
-    # Write the tracks dictionary to a JSON file
-    output_file_tracks = "playlist_generated/finished_playlist.json"
-    with open(output_file_tracks, 'w') as f:
-        json.dump(tracks, f, indent=4)
-
-    print("Generated tracks have been saved to", output_file_tracks)
-
-    # Load the generated playlist from the JSON file
-    with open(output_file_tracks, 'r') as f:
-        tracks = json.load(f)
-
-    # Initialize the Spotify client
-    sp = Spotify(auth_manager=oauth2.SpotifyOAuth(
-        client_id=CONFIG["SPOTIFY_CLIENT_ID"],
-        client_secret=CONFIG["SPOTIFY_CLIENT_SECRET"],
-        redirect_uri=CONFIG["SPOTIFY_REDIRECT_URI"],
-        scope=CONFIG["SPOTIFY_SCOPE"].split(","),
-        cache_path=CONFIG["SPOTIFY_CACHE_PATH"]
-    ))
-
-    # Function to create a new playlist on Spotify
-    def create_playlist(name, description=None, public=True):
-        user_id = sp.me()['id']
-        playlist = sp.user_playlist_create(user=user_id, name=name, public=public, description=description)
-        return playlist['id']
+    Returns:
+        StreamingResponse: A text/event-stream response.
 
-    # Function to add tracks to a Spotify playlist
-    def add_tracks_to_playlist(playlist_id, tracks):
-        # Extract track IDs from the tracks dictionary
-        track_ids = [track['track_id'] for track in tracks]
-        # Add tracks to the playlist
-        sp.playlist_add_items(playlist_id, track_ids)
+    Raises:
+        ExecutorSaturated: If the compute executor cannot take the classification.
+    """
+    events = generate_events(description, request.app.state.catalog_index, request.app.state.compute_executor)
+    try:
+        first = await events.__anext__()
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        first = ("error", {"detail": str(e)})
+
+    async def stream() -> AsyncIterator[str]:
+        yield format_event(*first)
+        if first[0] == "error":
+            return
+        tracks = []
+        try:
+            async for event, data in events:
+                if event == "scored":
+                    tracks = data["tracks"]
+                yield format_event(event, data)
+        except Exception as e:
+            yield format_event("error", {"detail": str(e)})
+            return
+        yield format_event("done", {"tracks": tracks})
+
+    # No caching or proxy buffering, so each event reaches the client as soon as it is sent
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    # Create a playlist on Spotify
-    playlist_id = create_playlist("SoundSmith Playlist", playlist.description)
-    
-    # Add tracks to the playlist
-    add_tracks_to_playlist(playlist_id, tracks)
+@playlist_router.get(
+    "/jobs/{job_id}",
+    response_description="Get the status of a playlist generation job",
+)
+def get_generate_job(job_id: str, request: Request) -> Dict:
+    """
+    Get the status of a playlist generation job and, once finished, its result.
 
-    print(f"Playlist 'SoundSmith Playlist' created with ID: {playlist_id}")
-    
-    return {'tracks': tracks}
+    Args:
+        job_id (str): The ID returned by POST /playlists/generate?job=true.
+        request (Request): The request object containing the application job queue.
+
+    Returns:
+        Dict: The job ID, its status (queued, running, done or failed), result and error.
+
+    Raises:
+        HTTPException: If the job is unknown or has expired.
+    """
+    queued = request.app.state.job_queue.status(job_id)
+    if queued is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found",
+        )
+    return queued
+
+@playlist_router.post(
+    "/generate/batch",
+    response_description="Generate playlists for many users in one scoring pass",
+)
+async def generate_playlist_batch(batch: PlaylistGenerateBatch, request: Request) -> Dict:
+    """
+    Generate playlists for many (user, description) pairs at once.
+
+    Descriptions are classified in one batched model call and every emotion group is ranked
+    against the in-memory catalog index. Nothing is written to Spotify.
+
+    Args:
+        batch (PlaylistGenerateBatch): The (user, description) pairs.
+        request (Request): The request object containing the application catalog index and compute executor.
+
+    Returns:
+        Dict: A dictionary containing the emotions and generated tracks of every user.
+    """
+    index = request.app.state.catalog_index
+    items = jsonable_encoder(batch.requests)
+    # Fetching the classifier can load the model, so it happens on the compute executor too
+    playlists = await request.app.state.compute_executor.run(
+        lambda: generate_batch(get_emotion_classifier(), index, items)
+    )
+    return {"playlists": playlists}
 
 @playlist_router.put(
     "jwt_token/{jwt_token}",
@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from typing import Any, Dict, List, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_PREFIX: str = "https://api.spotify.com/v1/"
+# Spotify accepts at most 100 items per playlist_add_items call
+MAX_ITEMS_PER_REQUEST: int = 100
+DEFAULT_MAX_WORKERS: int = 4
+DEFAULT_RETRIES: int = 3
+DEFAULT_BACKOFF_SECONDS: float = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Access tokens expire hourly, so only the most recent ones are worth remembering
+MAX_CACHED_TOKENS: int = 1024
+
+
+class SpotifyWriter:
+    """Writes generated playlists to Spotify over a pooled HTTP session.
+
+    The session keeps connections open between requests, the user ID of each access
+    token is fetched once, and track additions are split into 100-item chunks that are
+    sent concurrently. Rate limits and server errors that Spotify answered are retried
+    with exponential backoff, honouring Retry-After. POSTs that time out or lose their
+    connection are not retried, since Spotify may already have applied them; GETs are.
+    Point api_prefix at a local server to test against a fake.
+    """
+
+    def __init__(
+        self,
+        api_prefix: str = DEFAULT_API_PREFIX,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        retries: int = DEFAULT_RETRIES,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+    ):
+        self.api_prefix = api_prefix if api_prefix.endswith("/") else api_prefix + "/"
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spotify-writer")
+        self.user_ids: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def _request(self, method: str, path: str, token: str, json: Union[Dict[str, Any], None] = None) -> Dict[str, Any]:
+        url = self.api_prefix + path
+        headers = {"Authorization": f"Bearer {token}"}
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.request(method, url, headers=headers, json=json, timeout=10)
+            except requests.RequestException:
+                # A POST that timed out or lost its connection may still have been applied,
+                # and sending it again could create a second playlist or add a chunk twice
+                if method != "GET" or attempt == self.retries:
+                    raise
+                time.sleep(self.backoff_seconds * 2 ** attempt)
+                continue
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.retries:
+                # Spotify says how long to wait when rate limiting
+                retry_after = response.headers.get("Retry-After")
+                time.sleep(float(retry_after) if retry_after else self.backoff_seconds * 2 ** attempt)
+                continue
+            response.raise_for_status()
+            return response.json() if response.content else {}
+
+    def user_id(self, token: str) -> str:
+        """Spotify user ID of an access token, cached per token.
+
+        Args:
+            token (str): Spotify access token.
+
+        Returns:
+            str: The user ID.
+        """
+        user_id = self.user_ids.get(token)
+        if user_id is None:
+            user_id = self._request("GET", "me", token)["id"]
+            with self.lock:
+                self.user_ids[token] = user_id
+                while len(self.user_ids) > MAX_CACHED_TOKENS:
+                    del self.user_ids[next(iter(self.user_ids))]
+        return user_id
+
+    def create_playlist(self, token: str, name: str, description: Union[str, None] = None, public: bool = True) -> str:
+        """Create a playlist for the token's user.
+
+        Args:
+            token (str): Spotify access token.
+            name (str): Playlist name.
+            description (str, optional): Playlist description. Defaults to None.
+            public (bool): Whether the playlist is public. Defaults to True.
+
+        Returns:
+            str: The new playlist's ID.
+        """
+        body = {"name": name, "public": public}
+        if description is not None:
+            body["description"] = description
+        playlist = self._request("POST", f"users/{self.user_id(token)}/playlists", token, body)
+        return playlist["id"]
+
+    def add_tracks(self, token: str, playlist_id: str, track_ids: List[str], keep_order: bool = False) -> None:
+        """Add tracks to a playlist in 100-item chunks.
+
+        Chunks are sent concurrently and may land in any order. With keep_order they
+        are sent one after another so the playlist matches track_ids.
+
+        Args:
+            token (str): Spotify access token.
+            playlist_id (str): Playlist to add to.
+            track_ids (List[str]): Spotify track IDs.
+            keep_order (bool): Preserve the order of track_ids. Defaults to False.
+        """
+        chunks = [
+            {"uris": [f"spotify:track:{track_id}" for track_id in track_ids[start:start + MAX_ITEMS_PER_REQUEST]]}
+            for start in range(0, len(track_ids), MAX_ITEMS_PER_REQUEST)
+        ]
+        path = f"playlists/{playlist_id}/items"
+        if keep_order:
+            for chunk in chunks:
+                self._request("POST", path, token, chunk)
+            return
+        futures = [self.executor.submit(self._request, "POST", path, token, chunk) for chunk in chunks]
+        for future in futures:
+            future.result()
+
+    def write_playlist(self, token: str, name: str, description: Union[str, None], track_ids: List[str]) -> str:
+        """Create a playlist and fill it with tracks.
+
+        Args:
+            token (str): Spotify access token.
+            name (str): Playlist name.
+            description (str, optional): Playlist description.
+            track_ids (List[str]): Spotify track IDs.
+
+        Returns:
+            str: The new playlist's ID.
+        """
+        playlist_id = self.create_playlist(token, name, description)
+        self.add_tracks(token, playlist_id, track_ids)
+        return playlist_id
+
+    def close(self) -> None:
+        """Stop the chunk workers and close pooled connections."""
+        self.executor.shutdown(wait=True)
+        self.session.close()
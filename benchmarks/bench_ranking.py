@@ -0,0 +1,185 @@
+"""Ranking benchmarks on synthetic catalogs.
+
+Runs fully offline: tracks are generated in memory, nothing touches MongoDB or Spotify.
+
+    python benchmarks/bench_ranking.py --sizes 10000 100000 1000000
+    python benchmarks/bench_ranking.py --sizes 10000000 --repeat 5 --skip-legacy
+"""
+import argparse
+import pathlib
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Any
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+from mood_estimators import vector_ranker, vector_codec
+from mood_estimators.catalog_index import CatalogIndex
+from mood_estimators.centroid_store import compute_centroids
+from mood_estimators.ann_index import IVFIndex
+from mood_estimators.max_heap import MaxHeap
+from mood_estimators.song_details_calc import cosine_similarity
+
+DEFAULT_SIZES: List[int] = [10_000, 100_000, 1_000_000]
+GROUP: List[str] = ["happy", "chill", "happy", "sad"]
+STANDARD_SONGS_PER_QUADRANT: int = 10
+
+# Per-track Python loops are only run up to this catalog size
+LEGACY_MAX_SIZE: int = 10_000
+DICT_MAX_SIZE: int = 1_000_000
+
+
+def synthetic_matrix(n: int, seed: int = 0) -> np.ndarray:
+    """Mood vectors shaped like the ones reset_songs_vector.process_data_DB produces.
+
+    Audio features are drawn at random and pushed through the same scaling curves as
+    scale_valence, scale_energy and scale_tempo, plus random lyric sentiment.
+
+    Args:
+        n (int): Number of tracks.
+        seed (int): Random seed. Defaults to 0.
+
+    Returns:
+        np.ndarray: Float32 matrix with columns ordered as VECTOR_DIMENSIONS.
+    """
+    rng = np.random.default_rng(seed)
+    tempo = rng.normal(120, 30, n).clip(40, 220)
+    valence = rng.beta(2, 2, n)
+    energy = rng.beta(2, 2, n)
+    danceability = rng.beta(2, 2, n)
+    speechiness = rng.beta(1, 8, n)
+    positive = rng.dirichlet(np.ones(4), n)
+
+    scaled_valence = np.round((20 * (valence - 0.50) ** 3) * 40, 3)
+    scaled_energy = np.round((20 * (energy - 0.50) ** 3) * 40, 3)
+    scaled_tempo = np.round(0.00004 * (tempo - 90) ** 3, 3)
+
+    matrix = np.empty((n, len(vector_ranker.VECTOR_DIMENSIONS)), dtype=np.float32)
+    matrix[:, 0] = scaled_valence + 25 * (positive[:, 0] + positive[:, 2])
+    matrix[:, 1] = -scaled_valence + 25 * (positive[:, 1] + positive[:, 2])
+    matrix[:, 2] = scaled_energy + scaled_tempo
+    matrix[:, 3] = -scaled_energy - scaled_tempo
+    matrix[:, 4] = danceability
+    matrix[:, 5] = speechiness
+    return matrix
+
+
+def time_stage(stage: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Time a stage and measure its peak traced memory.
+
+    Args:
+        stage (Callable[[], Any]): The work to measure.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        Dict[str, float]: p50, p95 and p99 latency in milliseconds and peak memory in MiB.
+    """
+    tracemalloc.start()
+    stage()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        samples.append((time.perf_counter() - start) * 1000)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "peak_mib": peak / 2 ** 20}
+
+
+def legacy_rank(vectors: List[Dict[str, float]], standard: Dict[str, List[Dict[str, float]]], k: int) -> List[Any]:
+    """The pre-vectorization ranking loop: cosine_similarity per standard song and a MaxHeap."""
+    heap = MaxHeap()
+    for i, vector in enumerate(vectors):
+        P1 = np.array(list(vector.values()))
+        rank = []
+        for emotion in GROUP:
+            sum_ = 0
+            for each_song in standard[emotion]:
+                sum_ += cosine_similarity(P1, np.array(list(each_song.values())))
+            rank.append(round(sum_ / len(standard[emotion]), 4))
+        heap.insert((rank[0], rank[1], rank[2], rank[3], i))
+    return [heap.extract_max() for _ in range(min(k, len(vectors)))]
+
+
+def bench_size(n: int, repeat: int, k: int, skip_legacy: bool, workers: int) -> Dict[str, Dict[str, float]]:
+    """Benchmark every ranking stage on a catalog of n synthetic tracks.
+
+    Args:
+        n (int): Catalog size.
+        repeat (int): Timed runs per stage.
+        k (int): Number of top songs to rank.
+        skip_legacy (bool): Skip the per-track Python loops.
+        workers (int): Worker processes for the sharded stage, 1 to skip it.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Measurements per stage.
+    """
+    matrix = synthetic_matrix(n)
+    standard_matrix = synthetic_matrix(STANDARD_SONGS_PER_QUADRANT * len(vector_ranker.QUADRANTS), seed=1)
+    standard_quadrants = np.repeat(vector_ranker.QUADRANTS, STANDARD_SONGS_PER_QUADRANT)
+    centroids = compute_centroids(standard_matrix, standard_quadrants)
+    scores = vector_ranker.centroid_scores(matrix, centroids)
+    ranks = vector_ranker.group_scores(scores, GROUP)
+    packed = [row.astype(vector_codec.VECTOR_DTYPE).tobytes() for row in matrix]
+
+    index = CatalogIndex([str(i) for i in range(n)], [""] * n, [""] * n, matrix, centroids)
+
+    stages: Dict[str, Callable[[], Any]] = {
+        "decode_binary": lambda: vector_codec.decode_vectors(packed),
+        "centroid_scores": lambda: vector_ranker.centroid_scores(matrix, centroids),
+        "group_scores": lambda: vector_ranker.group_scores(scores, GROUP),
+        "top_k": lambda: vector_ranker.top_k_indices(ranks, k),
+        "index_rank": lambda: index.rank(GROUP, k),
+    }
+
+    if n <= DICT_MAX_SIZE:
+        vectors = [dict(zip(vector_ranker.VECTOR_DIMENSIONS, row.tolist())) for row in matrix]
+        stages["pack_dicts"] = lambda: vector_codec.pack_vectors(vectors)
+
+        if not skip_legacy and n <= LEGACY_MAX_SIZE:
+            standard = {
+                quadrant: [dict(zip(vector_ranker.VECTOR_DIMENSIONS, row.tolist())) for row in standard_matrix[standard_quadrants == quadrant]]
+                for quadrant in vector_ranker.QUADRANTS
+            }
+            stages["legacy_loop"] = lambda: legacy_rank(vectors, standard, k)
+
+    ann = IVFIndex.build(matrix)
+    stages["ann_search"] = lambda: ann.search(centroids[GROUP[0]], min_candidates=k)
+
+    sharded_index = CatalogIndex(index.track_ids, index.track_names, index.artist_names, matrix, centroids)
+    if workers > 1:
+        sharded_index.enable_sharding(workers)
+        stages["sharded_rank"] = lambda: sharded_index.rank(GROUP, k)
+
+    results = {}
+    try:
+        for name, stage in stages.items():
+            # The legacy loop takes seconds per run, so time it once
+            results[name] = time_stage(stage, 1 if name == "legacy_loop" else repeat)
+    finally:
+        sharded_index.close()
+    return results
+
+
+def main() -> None:
+    """Run the ranking benchmarks and print a latency and memory table per catalog size."""
+    parser = argparse.ArgumentParser(description="Benchmark mood ranking on synthetic catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="catalog sizes, e.g. 10000 100000 1000000 10000000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--k", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the sharded stage")
+    parser.add_argument("--skip-legacy", action="store_true", help="skip the per-track Python loop")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        print(f"\n{n:,} tracks")
+        print(f"{'stage':<18}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'peak MiB':>12}")
+        for name, result in bench_size(n, args.repeat, args.k, args.skip_legacy, args.workers).items():
+            print(f"{name:<18}{result['p50']:>12.3f}{result['p95']:>12.3f}{result['p99']:>12.3f}{result['peak_mib']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
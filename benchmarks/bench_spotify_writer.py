@@ -0,0 +1,135 @@
+"""Benchmark of the pooled SpotifyWriter against a local fake Spotify Web API.
+
+The fake answers the three endpoints the writer uses after a fixed latency, rejects
+track additions over 100 items like Spotify does, and rate limits a share of requests
+with 429 and Retry-After. The spotipy baseline sends one unchunked call through a new client.
+
+    python benchmarks/bench_spotify_writer.py --tracks 40 500 --latency-ms 50
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import pathlib
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from spotipy import Spotify
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+from api.spotify_writer import SpotifyWriter, MAX_ITEMS_PER_REQUEST
+
+
+class FakeSpotify(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients reuse their connections
+    protocol_version = "HTTP/1.1"
+    latency: float = 0.0
+    rate_limit_share: float = 0.0
+    playlists: Dict[str, List[str]] = {}
+    requests: int = 0
+    lock = threading.Lock()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _reply(self, status: int, body: Any, headers: Dict[str, str] = {}) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self) -> None:
+        with FakeSpotify.lock:
+            FakeSpotify.requests += 1
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length)) if length else {}
+        time.sleep(self.latency)
+        if random.random() < self.rate_limit_share:
+            self._reply(429, {"error": {"status": 429}}, {"Retry-After": "0.01"})
+            return
+        parts = self.path.strip("/").split("/")[1:]
+        if self.command == "GET" and parts == ["me"]:
+            self._reply(200, {"id": "fake-user"})
+        elif self.command == "POST" and parts[0] == "users":
+            with FakeSpotify.lock:
+                playlist_id = f"playlist{len(FakeSpotify.playlists)}"
+                FakeSpotify.playlists[playlist_id] = []
+            self._reply(201, {"id": playlist_id})
+        elif self.command == "POST" and parts[0] == "playlists":
+            uris = body if isinstance(body, list) else body.get("uris", [])
+            if len(uris) > MAX_ITEMS_PER_REQUEST:
+                self._reply(400, {"error": {"status": 400, "message": "Too many ids requested"}})
+                return
+            with FakeSpotify.lock:
+                FakeSpotify.playlists[parts[1]].extend(uris)
+            self._reply(201, {"snapshot_id": "snapshot"})
+        else:
+            self._reply(404, {"error": {"status": 404}})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+def time_call(fn: Callable[[], Any], repeats: int) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", nargs="+", type=int, default=[40, 500])
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--rate-limit-share", type=float, default=0.05)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    FakeSpotify.latency = args.latency_ms / 1000
+    FakeSpotify.rate_limit_share = args.rate_limit_share
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSpotify)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    prefix = f"http://127.0.0.1:{server.server_port}/v1/"
+    writer = SpotifyWriter(prefix, backoff_seconds=0.01)
+
+    def spotipy_write(track_ids: List[str]) -> str:
+        sp = Spotify(auth="token", requests_timeout=10)
+        sp.prefix = prefix
+        user_id = sp.me()["id"]
+        playlist_id = sp.user_playlist_create(user_id, "SoundSmith Playlist")["id"]
+        sp.playlist_add_items(playlist_id, track_ids)
+        return playlist_id
+
+    for n in args.tracks:
+        track_ids = [f"{i:022d}" for i in range(n)]
+        for name, write in (
+            ("spotipy", lambda: spotipy_write(track_ids)),
+            ("writer", lambda: writer.write_playlist("token", "SoundSmith Playlist", None, track_ids)),
+        ):
+            FakeSpotify.requests = 0
+            try:
+                timings = time_call(write, args.repeats)
+            except Exception as e:
+                print(f"n={n:>6} {name:>8}: failed ({type(e).__name__}: {str(e).splitlines()[0]})")
+                continue
+            last = FakeSpotify.playlists[f"playlist{len(FakeSpotify.playlists) - 1}"]
+            print(
+                f"n={n:>6} {name:>8}: p50 {statistics.median(timings) * 1000:8.1f} ms"
+                f"  requests/run {FakeSpotify.requests / args.repeats:5.1f}  tracks added {len(last)}"
+            )
+
+    writer.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
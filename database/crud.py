@@ -7,6 +7,8 @@ from pymongo import MongoClient
 
 sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
 from auth import hasher
+from mood_estimators import vector_codec
+from mood_estimators.catalog_version import bump_catalog_version
 
 def get_lyrics(artist:str, title:str, db: MongoClient)->str:
     """
@@ -312,7 +314,18 @@ def update_track(track_id: str, track: Dict[str, str], db: MongoClient) -> None:
         track_id (str): Track ID
         track (Dict[str, str]): Track
     """
+    # Standard tags and vectors feed the catalog index and the stored quadrant centroids
+    ranking_fields = [field for field in ("standard", "vector") if field in track]
+    previous = db["tracks"].find_one({"_id": track_id}, {field: 1 for field in ranking_fields}) if ranking_fields else None
+    ranking_changed = any(track[field] != (previous or {}).get(field) for field in ranking_fields)
+
+    # Keep the packed copy of the vector in step with the sub-document
+    if "vector" in track:
+        track = {**track, **vector_codec.vector_fields(track["vector"])}
     db["tracks"].update_one({"_id": track_id}, {"$set": track, "time": datetime.now()})
+    # The next load_centroids and catalog refresh see the new version and rebuild from it
+    if ranking_changed:
+        bump_catalog_version(db)
 
 
 def delete_track(track_id: str, db: MongoClient) -> None:
@@ -0,0 +1,88 @@
+import argparse
+import json
+import random
+from typing import Any, Callable, Dict, List
+
+try:
+    from song_details_calc import map_emotions, get_db_connection
+    from catalog_index import CatalogIndex
+    from vector_snapshot import load_snapshot
+    from model_registry import get_emotion_classifier
+    from playlist_pipeline import predictions_to_dict
+except ImportError:
+    from mood_estimators.song_details_calc import map_emotions, get_db_connection
+    from mood_estimators.catalog_index import CatalogIndex
+    from mood_estimators.vector_snapshot import load_snapshot
+    from mood_estimators.model_registry import get_emotion_classifier
+    from mood_estimators.playlist_pipeline import predictions_to_dict
+
+# Descriptions per forward pass of the emotion classifier
+CLASSIFIER_BATCH_SIZE: int = 32
+
+
+def classify_descriptions(classifier: Callable, descriptions: List[str], batch_size: int = CLASSIFIER_BATCH_SIZE) -> List[List[str]]:
+    """Classify many playlist descriptions in one batched model call.
+
+    Args:
+        classifier (Callable): go_emotions text-classification pipeline created with top_k=None.
+        descriptions (List[str]): Playlist descriptions.
+        batch_size (int): Descriptions per forward pass. Defaults to CLASSIFIER_BATCH_SIZE.
+
+    Returns:
+        List[List[str]]: Emotion group of every description.
+    """
+    predictions = classifier(descriptions, batch_size=batch_size)
+    return [map_emotions(list(predictions_to_dict(prediction))) for prediction in predictions]
+
+
+def generate_batch(classifier: Callable, index: CatalogIndex, requests: List[Dict[str, str]], numReturned: int = 500, playlistNum: int = 40) -> List[Dict[str, Any]]:
+    """Generate playlists for many (user, description) pairs in one scoring pass.
+
+    Args:
+        classifier (Callable): go_emotions text-classification pipeline created with top_k=None.
+        index (CatalogIndex): Catalog to rank against.
+        requests (List[Dict[str, str]]): Items with "user_id" and "description".
+        numReturned (int): Number of top songs to sample from. Defaults to 500.
+        playlistNum (int): Number of songs per playlist. Defaults to 40.
+
+    Returns:
+        List[Dict[str, Any]]: "user_id", "emotions" and "tracks" of every request, in order.
+    """
+    groups = classify_descriptions(classifier, [request["description"] for request in requests])
+    rankings = index.rank_many(groups, numReturned)
+
+    playlists = []
+    for request, group, top_songs in zip(requests, groups, rankings):
+        playlists.append({
+            "user_id": request["user_id"],
+            "emotions": group,
+            "tracks": random.sample(top_songs, min(playlistNum, len(top_songs))),
+        })
+    return playlists
+
+
+def main() -> None:
+    """Generate playlists for every (user, description) pair in a JSON file."""
+    parser = argparse.ArgumentParser(description="Generate mood playlists for many users at once")
+    parser.add_argument("input", help='JSON list of {"user_id": ..., "description": ...} objects')
+    parser.add_argument("output", help="where to write the generated playlists")
+    parser.add_argument("--num-returned", type=int, default=500)
+    parser.add_argument("--playlist-num", type=int, default=40)
+    args = parser.parse_args()
+
+    with open(args.input, "r") as f:
+        requests = json.load(f)
+
+    index = load_snapshot()
+    if index is None:
+        index = CatalogIndex.from_db(get_db_connection())
+
+    playlists = generate_batch(get_emotion_classifier(), index, requests, args.num_returned, args.playlist_num)
+
+    with open(args.output, "w") as f:
+        json.dump(playlists, f, indent=4)
+    print(f"Generated {len(playlists)} playlists, saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
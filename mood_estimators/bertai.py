@@ -1,8 +1,123 @@
-from transformers import pipeline
+import re
+from typing import Any, Dict, List, Tuple
+
+try:
+    from model_registry import registry, LYRICS_MODEL
+    from line_cache import get_line_cache
+except ImportError:
+    from mood_estimators.model_registry import registry, LYRICS_MODEL
+    from mood_estimators.line_cache import get_line_cache
+
+# Lines per forward pass when classifying in batches
+LINE_BATCH_SIZE = 64
+
+
+def split_lines(text: str) -> List[str]:
+    """Split lyrics into their non-empty, stripped lines."""
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
+
+def normalize_line(line: str) -> str:
+    """Key under which repeated lines share one classification.
+
+    Only case and whitespace are folded: the uncased BERT tokenizer ignores both, so
+    lines with the same key get the same tokens and the same label.
+    """
+    return re.sub(r"\s+", " ", line.lower()).strip()
+
+
+def classify_batches(lines: List[str], batch_size: int = LINE_BATCH_SIZE) -> List[Tuple[str, float]]:
+    """Classify lines with the shared poems-sentiment model in length-bucketed batches.
+
+    Lines are sorted by length before batching, so each padded batch holds lines of similar
+    length and little compute goes to padding. Results come back in the input order.
+
+    Args:
+        lines (List[str]): Lines to classify.
+        batch_size (int): Lines per forward pass. Defaults to LINE_BATCH_SIZE.
+
+    Returns:
+        List[Tuple[str, float]]: (label, score) of each line.
+    """
+    pipe = registry.get(LYRICS_MODEL)
+    order = sorted(range(len(lines)), key=lambda i: len(lines[i]))
+    results: List[Tuple[str, float]] = [None] * len(lines)
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        predictions = pipe([lines[i] for i in bucket], batch_size=len(bucket))
+        for i, prediction in zip(bucket, predictions):
+            results[i] = (prediction['label'], prediction['score'])
+    return results
+
+
+def classify_lines(lines: List[str], batch_size: int = LINE_BATCH_SIZE) -> List[Tuple[str, float]]:
+    """Classify lines, running each distinct normalized line through the model once.
+
+    Choruses and repeated hooks are classified a single time and their result is reused
+    for every occurrence, so label counts, and therefore percentages, are unchanged.
+    Lines already in the persistent line cache, from this song or any earlier one, skip
+    the model entirely.
+
+    Args:
+        lines (List[str]): Lines to classify.
+        batch_size (int): Lines per forward pass. Defaults to LINE_BATCH_SIZE.
+
+    Returns:
+        List[Tuple[str, float]]: (label, score) of each line.
+    """
+    distinct: Dict[str, str] = {}
+    keys: List[str] = []
+    for line in lines:
+        key = normalize_line(line)
+        distinct.setdefault(key, line)
+        keys.append(key)
+
+    cache = get_line_cache()
+    outputs = cache.get_many(list(distinct)) if cache is not None else {}
+    missing = [key for key in distinct if key not in outputs]
+    if missing:
+        computed = dict(zip(missing, classify_batches([distinct[key] for key in missing], batch_size)))
+        if cache is not None:
+            cache.put_many(computed)
+        outputs.update(computed)
+    return [outputs[key] for key in keys]
+
+
+def mood_percentages(labels: List[str]) -> Dict[str, float]:
+    """Share of each sentiment label among a song's lines, rounded to 2 decimals.
+
+    A song without lines gets 0 for every label instead of failing its whole batch.
+    """
+    counts = {label: labels.count(label) for label in ('positive', 'negative', 'mixed', 'no_impact')}
+    total_labels = sum(counts.values())
+    return {
+        f"{label}_percentage": round(count / total_labels, 2) if total_labels else 0.0
+        for label, count in counts.items()
+    }
+
+
+def get_lyrics_moods(texts: List[str], batch_size: int = LINE_BATCH_SIZE) -> List[Dict[str, float]]:
+    """Sentiment percentages of many songs, classifying all their lines in shared batches.
+
+    Args:
+        texts (List[str]): Lyrics of each song.
+        batch_size (int): Lines per forward pass. Defaults to LINE_BATCH_SIZE.
+
+    Returns:
+        List[Dict[str, float]]: The get_lyrics_mood percentages of each song.
+    """
+    song_lines = [split_lines(text) for text in texts]
+    results = classify_lines([line for lines in song_lines for line in lines], batch_size)
+    moods = []
+    start = 0
+    for lines in song_lines:
+        moods.append(mood_percentages([label for label, _ in results[start:start + len(lines)]]))
+        start += len(lines)
+    return moods
+
 
 def get_lyrics_mood(text, printResults = False):
-    # Load the text classification pipeline with a pre-trained model
-    pipe = pipeline("text-classification", model='nickwong64/bert-base-uncased-poems-sentiment')
+    # The model is loaded once per process and shared through the registry
 
     # Example text
 #     text = """
@@ -41,24 +156,16 @@ def get_lyrics_mood(text, printResults = False):
 #     """
 
     # Split text into lines
-    lines = []
-    for line in text.split('\n'):
-        line = line.strip()
-        if line:
-            lines.append(line)
+    lines = split_lines(text)
 
-    # Classify each line and collect results
+    # Classify all lines in batches and collect results
     results_per_line = []
     positive_count = 0
     negative_count = 0
     no_impact_count = 0
     mixed_count = 0
 
-    for line in lines:
-        result = pipe(line)[0]
-        score = result['score']
-        label = result['label']
-
+    for line, (label, score) in zip(lines, classify_lines(lines)):
         if label == 'positive':
             positive_count += 1
         elif label == 'negative':
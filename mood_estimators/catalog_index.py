@@ -0,0 +1,160 @@
+from typing import Dict, List, Union
+import numpy as np
+from pymongo import MongoClient
+
+try:
+    import vector_ranker
+    import vector_codec
+    import centroid_store
+    from catalog_version import get_catalog_version
+    from ann_index import IVFIndex, DEFAULT_NPROBE
+    from sharded_ranker import ShardedRanker
+except ImportError:
+    from mood_estimators import vector_ranker
+    from mood_estimators import vector_codec
+    from mood_estimators import centroid_store
+    from mood_estimators.catalog_version import get_catalog_version
+    from mood_estimators.ann_index import IVFIndex, DEFAULT_NPROBE
+    from mood_estimators.sharded_ranker import ShardedRanker
+
+# Only the fields needed to describe a track; vector_codec adds the vector fields
+TRACK_PROJECTION: Dict[str, int] = {"spotify.track_id": 1, "track_name": 1, "artist_name": 1}
+
+# Catalogs at least this large are ranked through the ANN index when one is attached
+ANN_THRESHOLD: int = 1_000_000
+
+
+class CatalogIndex:
+    """In-memory copy of the catalog's mood vectors for ranking without database round trips.
+
+    Quadrant similarities are computed once on load, or taken from a snapshot, so a
+    ranking request only reorders columns and runs a partial sort.
+    """
+
+    def __init__(self, track_ids: List[str], track_names: List[str], artist_names: List[str], matrix: np.ndarray, centroids: Dict[str, np.ndarray], catalog_version: int = 0, scores: Union[np.ndarray, None] = None):
+        self.track_ids = track_ids
+        self.track_names = track_names
+        self.artist_names = artist_names
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.centroids = centroids
+        self.catalog_version = catalog_version
+        # Precomputed scores, such as a memory-mapped snapshot's, spare a pass over the whole matrix
+        self.scores = vector_ranker.centroid_scores(self.matrix, centroids) if scores is None else scores
+        self.ann: Union[IVFIndex, None] = None
+        self.nprobe = DEFAULT_NPROBE
+        self.fill_k = True
+        self.sharded: Union[ShardedRanker, None] = None
+
+    @classmethod
+    def from_db(cls, db: MongoClient) -> "CatalogIndex":
+        """Load the index from the tracks and centroids collections.
+
+        Args:
+            db (MongoClient): The MongoDB client.
+
+        Returns:
+            CatalogIndex: The loaded index.
+        """
+        tracks, matrix = vector_codec.find_track_vectors(db, {}, TRACK_PROJECTION)
+        return cls(
+            [track["spotify"]["track_id"] for track in tracks],
+            [track["track_name"] for track in tracks],
+            [track["artist_name"] for track in tracks],
+            matrix,
+            centroid_store.load_centroids(db),
+            get_catalog_version(db),
+        )
+
+    def __len__(self) -> int:
+        return len(self.track_ids)
+
+    def track(self, i: int) -> Dict[str, str]:
+        """Describe the track at a row of the index.
+
+        Args:
+            i (int): Row index.
+
+        Returns:
+            Dict[str, str]: Track ID, track name and artist name.
+        """
+        return {"track_id": self.track_ids[i], "track_name": self.track_names[i], "artist_name": self.artist_names[i]}
+
+    def attach_ann(self, ann: IVFIndex, nprobe: int = DEFAULT_NPROBE, fill_k: bool = True) -> bool:
+        """Rank through an ANN index once the catalog exceeds ANN_THRESHOLD.
+
+        Args:
+            ann (IVFIndex): Index built from this catalog.
+            nprobe (int): Cells scanned per query, trading recall for latency. Defaults to DEFAULT_NPROBE.
+            fill_k (bool): Probe past nprobe cells when they hold fewer rows than requested, so a
+                ranking always returns numReturned tracks. Off, nprobe is a hard cap on the cells
+                scanned and small cells can shorten the ranking. Defaults to True.
+
+        Returns:
+            bool: Whether the index was attached. Indexes built from a different catalog are rejected.
+        """
+        if len(ann) != len(self) or (ann.track_ids is not None and not np.array_equal(ann.track_ids, self.track_ids)):
+            print("ANN index does not match the catalog, rebuild it with ann_index.py build")
+            return False
+        self.ann = ann
+        self.nprobe = nprobe
+        self.fill_k = fill_k
+        return True
+
+    def enable_sharding(self, workers: int) -> None:
+        """Rank exact queries across a pool of worker processes sharing the cached scores.
+
+        Ranking cached scores takes a few milliseconds even for large catalogs, so the
+        round trip to the workers usually costs more than it saves. The API does not
+        shard; bench_ranking.py --workers measures whether it pays off on a given machine.
+
+        Args:
+            workers (int): Number of worker processes.
+        """
+        self.close()
+        self.sharded = ShardedRanker(self.scores, workers)
+
+    def close(self) -> None:
+        """Stop the sharding workers, if any."""
+        if self.sharded is not None:
+            self.sharded.close()
+            self.sharded = None
+
+    def rank(self, group: List[str], numReturned: int = 500) -> List[Dict[str, str]]:
+        """Rank the catalog for an emotion group.
+
+        Args:
+            group (List[str]): Emotions in ranking priority order.
+            numReturned (int): Number of top songs to return. Defaults to 500.
+
+        Returns:
+            List[Dict[str, str]]: Top songs, best first.
+        """
+        if self.ann is not None and len(self) >= ANN_THRESHOLD:
+            # Only rows near the top emotion's centroid are ranked, skipping the pass over all N scores
+            candidates = self.ann.search(self.centroids[group[0]], self.nprobe, numReturned if self.fill_k else 0)
+            ranks = vector_ranker.group_scores(self.scores[candidates], group)
+            return [self.track(i) for i in candidates[vector_ranker.top_k_indices(ranks, numReturned)]]
+
+        if self.sharded is not None:
+            return [self.track(i) for i in self.sharded.top_k(group, numReturned)]
+
+        ranks = vector_ranker.group_scores(self.scores, group)
+        return [self.track(i) for i in vector_ranker.top_k_indices(ranks, numReturned)]
+
+    def rank_many(self, groups: List[List[str]], numReturned: int = 500) -> List[List[Dict[str, str]]]:
+        """Rank the catalog for many emotion groups at once.
+
+        All groups share the quadrant scores computed on load, and each distinct group is ranked once.
+
+        Args:
+            groups (List[List[str]]): Emotion groups in ranking priority order.
+            numReturned (int): Number of top songs to return per group. Defaults to 500.
+
+        Returns:
+            List[List[Dict[str, str]]]: Top songs for every group, in the order of groups.
+        """
+        ranked: Dict[tuple, List[Dict[str, str]]] = {}
+        for group in groups:
+            if tuple(group) not in ranked:
+                ranked[tuple(group)] = self.rank(group, numReturned)
+        return [ranked[tuple(group)] for group in groups]
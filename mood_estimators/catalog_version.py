@@ -0,0 +1,38 @@
+from datetime import datetime
+from pymongo import MongoClient, ReturnDocument
+
+# Single document in the "metadata" collection tracking the mood-vector catalog version
+CATALOG_META_ID: str = "catalog"
+
+
+def get_catalog_version(db: MongoClient) -> int:
+    """Get the current version of the mood-vector catalog.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+
+    Returns:
+        int: Catalog version, 0 if the catalog was never versioned.
+    """
+    meta = db.metadata.find_one({"_id": CATALOG_META_ID})
+    if meta is None:
+        return 0
+    return meta["version"]
+
+
+def bump_catalog_version(db: MongoClient) -> int:
+    """Mark the catalog as changed. Call whenever a track's vector or standard tag changes.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+
+    Returns:
+        int: The new catalog version.
+    """
+    meta = db.metadata.find_one_and_update(
+        {"_id": CATALOG_META_ID},
+        {"$inc": {"version": 1}, "$set": {"time": datetime.now()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return meta["version"]
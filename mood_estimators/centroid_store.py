@@ -0,0 +1,99 @@
+from datetime import datetime
+from typing import Dict, List, Sequence
+import numpy as np
+from pymongo import MongoClient
+
+try:
+    import vector_ranker
+    import vector_codec
+    from catalog_version import get_catalog_version
+except ImportError:
+    from mood_estimators import vector_ranker
+    from mood_estimators import vector_codec
+    from mood_estimators.catalog_version import get_catalog_version
+
+# Bump when the centroid layout changes (e.g. VECTOR_DIMENSIONS) so stored centroids get rebuilt
+CENTROID_SCHEMA_VERSION: int = 1
+
+
+def compute_centroids(standard_matrix: np.ndarray, standard_quadrants: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Compute the mean of the normalized standard-song vectors for every quadrant.
+
+    The dot product of a unit track vector with a centroid equals the average cosine
+    similarity of that track against the quadrant's standard songs.
+
+    Args:
+        standard_matrix (np.ndarray): Standard song vectors, shape (M, D).
+        standard_quadrants (Sequence[str]): Quadrant of each standard song row.
+
+    Returns:
+        Dict[str, np.ndarray]: Centroid per quadrant. Quadrants without standard songs get zeros.
+    """
+    centroids: Dict[str, np.ndarray] = {}
+    normalized = vector_ranker.normalize_rows(standard_matrix)
+    standard_quadrants = np.asarray(standard_quadrants)
+    for quadrant in vector_ranker.QUADRANTS:
+        members = standard_quadrants == quadrant
+        if members.any():
+            centroids[quadrant] = normalized[members].mean(axis=0)
+        else:
+            centroids[quadrant] = np.zeros(len(vector_ranker.VECTOR_DIMENSIONS), dtype=np.float32)
+    return centroids
+
+
+def rebuild_centroids(db: MongoClient) -> Dict[str, np.ndarray]:
+    """Recompute and store the centroid of every quadrant.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+
+    Returns:
+        Dict[str, np.ndarray]: The stored centroids.
+    """
+    standard_tracks, standard_matrix = vector_codec.find_track_vectors(
+        db,
+        {"standard": {"$in": list(vector_ranker.QUADRANTS)}},
+        {"standard": 1},
+    )
+    centroids = compute_centroids(standard_matrix, [track["standard"] for track in standard_tracks])
+    catalog_version = get_catalog_version(db)
+
+    for quadrant, centroid in centroids.items():
+        db.centroids.replace_one(
+            {"_id": quadrant},
+            {
+                "centroid": centroid.tolist(),
+                "count": sum(1 for track in standard_tracks if track["standard"] == quadrant),
+                "schema_version": CENTROID_SCHEMA_VERSION,
+                "catalog_version": catalog_version,
+                "time": datetime.now(),
+            },
+            upsert=True,
+        )
+    return centroids
+
+
+def load_centroids(db: MongoClient) -> Dict[str, np.ndarray]:
+    """Load the stored quadrant centroids, rebuilding them if any are missing or outdated.
+
+    Centroids are outdated when they were stored under another schema version or
+    another catalog version than the current one.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+
+    Returns:
+        Dict[str, np.ndarray]: Centroid per quadrant.
+    """
+    catalog_version = get_catalog_version(db)
+    centroids: Dict[str, np.ndarray] = {}
+    for quadrant in vector_ranker.QUADRANTS:
+        stored = db.centroids.find_one({"_id": quadrant})
+        if (
+            stored is None
+            or stored.get("schema_version") != CENTROID_SCHEMA_VERSION
+            or stored.get("catalog_version") != catalog_version
+        ):
+            return rebuild_centroids(db)
+        centroids[quadrant] = np.array(stored["centroid"], dtype=np.float32)
+    return centroids
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Tuple, Union
+
+try:
+    from model_registry import model_version, LYRICS_MODEL
+except ImportError:
+    from mood_estimators.model_registry import model_version, LYRICS_MODEL
+
+# Writable data directory shared by every script and checkout, outside the source tree
+DATA_DIRECTORY: str = os.environ.get("SOUNDSMITH_DATA_DIR", os.path.join(os.path.expanduser("~"), ".cache", "soundsmith"))
+DEFAULT_LINE_CACHE_PATH: str = os.environ.get("LINE_CACHE_PATH", os.path.join(DATA_DIRECTORY, "line_sentiment_cache.sqlite"))
+# SQLite caps the number of parameters per statement
+LOOKUP_CHUNK_SIZE: int = 500
+
+
+class LineCache:
+    """Persistent cache of per-line sentiment model outputs, shared across songs and runs.
+
+    Entries are keyed by a hash of the model version and the normalized line, so a new
+    model, revision or inference backend never reads the old model's labels. The SQLite
+    file can be shared by several processes.
+    """
+
+    def __init__(self, path: str, model_version: str):
+        self.path = path
+        self.model_version = model_version
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS line_sentiment (key TEXT PRIMARY KEY, model_version TEXT NOT NULL, label TEXT NOT NULL, score REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def key(self, normalized_line: str) -> str:
+        """Content hash of a normalized line under this cache's model version."""
+        return hashlib.sha256(f"{self.model_version}\0{normalized_line}".encode()).hexdigest()
+
+    def get_many(self, normalized_lines: List[str]) -> Dict[str, Tuple[str, float]]:
+        """Look up cached outputs.
+
+        Args:
+            normalized_lines (List[str]): Distinct normalized lines.
+
+        Returns:
+            Dict[str, Tuple[str, float]]: (label, score) of each line found, keyed by line.
+        """
+        keys = {self.key(line): line for line in normalized_lines}
+        found: Dict[str, Tuple[str, float]] = {}
+        key_list = list(keys)
+        with self.lock:
+            for start in range(0, len(key_list), LOOKUP_CHUNK_SIZE):
+                chunk = key_list[start:start + LOOKUP_CHUNK_SIZE]
+                rows = self.db.execute(
+                    f"SELECT key, label, score FROM line_sentiment WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, label, score in rows:
+                    found[keys[key]] = (label, score)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, outputs: Dict[str, Tuple[str, float]]) -> None:
+        """Cache model outputs.
+
+        Args:
+            outputs (Dict[str, Tuple[str, float]]): (label, score) keyed by normalized line.
+        """
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO line_sentiment (key, model_version, label, score) VALUES (?, ?, ?, ?)",
+                [(self.key(line), self.model_version, label, score) for line, (label, score) in outputs.items()],
+            )
+            self.db.commit()
+
+    def purge_other_versions(self) -> int:
+        """Delete entries written by other model versions.
+
+        Returns:
+            int: Number of entries deleted.
+        """
+        with self.lock:
+            deleted = self.db.execute("DELETE FROM line_sentiment WHERE model_version != ?", (self.model_version,)).rowcount
+            self.db.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters of this process.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, hit rate and the model version.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "model_version": self.model_version,
+            }
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self.lock:
+            self.db.close()
+
+
+_line_cache: Union[LineCache, None] = None
+_line_cache_path: Union[str, None] = DEFAULT_LINE_CACHE_PATH
+_line_cache_lock = threading.Lock()
+
+
+def configure_line_cache(path: Union[str, None] = DEFAULT_LINE_CACHE_PATH) -> None:
+    """Set the SQLite file of the shared line cache before it is first used.
+
+    Args:
+        path (str, optional): SQLite file, or None to turn the cache off. Defaults to DEFAULT_LINE_CACHE_PATH.
+    """
+    global _line_cache, _line_cache_path
+    with _line_cache_lock:
+        if _line_cache is not None:
+            _line_cache.close()
+        _line_cache = None
+        _line_cache_path = path
+
+
+def get_line_cache() -> Union[LineCache, None]:
+    """The shared line cache, opened on first use, or None if it is turned off."""
+    global _line_cache
+    if _line_cache is None and _line_cache_path is not None:
+        with _line_cache_lock:
+            if _line_cache is None:
+                _line_cache = LineCache(_line_cache_path, model_version(LYRICS_MODEL))
+    return _line_cache
+
+
+if __name__ == "__main__":
+    # Drop entries left behind by earlier models, revisions or inference backends
+    cache = get_line_cache()
+    print(f"Deleted {cache.purge_other_versions()} entries not written by {cache.model_version}")
@@ -0,0 +1,95 @@
+from concurrent.futures import Future
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Tuple
+
+DEFAULT_MAX_BATCH_SIZE: int = 16
+DEFAULT_MAX_WAIT_MS: float = 5.0
+
+
+class MicroBatcher:
+    """Collects single inputs arriving from many threads and runs them as one batch.
+
+    A batch is closed once it holds max_batch_size inputs or max_wait_ms has passed since
+    its first input arrived, then batch_fn runs once and each caller gets its own output.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.pending: "queue.Queue[Tuple[Any, Future] | None]" = queue.Queue()
+        self.worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self.worker.start()
+
+    def submit(self, item: Any) -> Future:
+        """Queue an input for the next batch.
+
+        Args:
+            item (Any): One input to batch_fn.
+
+        Returns:
+            Future: Resolves to the output for this input.
+        """
+        future: Future = Future()
+        self.pending.put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """Run one input through the next batch and wait for its output.
+
+        Args:
+            item (Any): One input to batch_fn.
+
+        Returns:
+            Any: The output for this input.
+        """
+        return self.submit(item).result()
+
+    def _collect(self) -> List[Tuple[Any, Future]] | None:
+        first = self.pending.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                # Finish this batch, then stop
+                self.pending.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Drop inputs whose callers cancelled; the rest can no longer be cancelled
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                outputs = list(self.batch_fn([item for item, _ in batch]))
+                if len(outputs) != len(batch):
+                    raise ValueError(f"batch_fn returned {len(outputs)} outputs for {len(batch)} inputs")
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+            except BaseException as e:
+                # Fail whatever is still unresolved; the worker keeps serving later batches
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def close(self) -> None:
+        """Run the inputs already queued, then stop the worker."""
+        self.pending.put(None)
+        self.worker.join()
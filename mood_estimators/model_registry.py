@@ -0,0 +1,197 @@
+import os
+import threading
+from typing import Any, Callable, Dict, List, Union
+from transformers import pipeline
+
+try:
+    from micro_batcher import MicroBatcher, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+    import onnx_backend
+except ImportError:
+    from mood_estimators.micro_batcher import MicroBatcher, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+    from mood_estimators import onnx_backend
+
+EMOTION_MODEL: str = "SamLowe/roberta-base-go_emotions"
+LYRICS_MODEL: str = "nickwong64/bert-base-uncased-poems-sentiment"
+INFERENCE_BACKENDS: List[str] = ["torch", "onnx"]
+# Hub revisions the models are loaded from. Pin commit hashes so cached outputs stay tied to the weights.
+MODEL_REVISIONS: Dict[str, str] = {
+    EMOTION_MODEL: os.environ.get("EMOTION_MODEL_REVISION", "main"),
+    LYRICS_MODEL: os.environ.get("LYRICS_MODEL_REVISION", "main"),
+}
+
+# "torch" runs the full-precision PyTorch models, "onnx" the int8 models exported by onnx_backend.py
+_inference_backend: str = os.environ.get("INFERENCE_BACKEND", "torch")
+
+
+def configure_inference_backend(backend: str) -> None:
+    """Choose how models are run before they are first loaded.
+
+    Args:
+        backend (str): One of INFERENCE_BACKENDS.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    global _inference_backend
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {INFERENCE_BACKENDS}")
+    _inference_backend = backend
+
+
+def model_revision(model_name: str) -> str:
+    """Hub revision a model is loaded from.
+
+    Args:
+        model_name (str): Hugging Face model name.
+
+    Returns:
+        str: The configured revision, "main" unless pinned.
+    """
+    return MODEL_REVISIONS.get(model_name, "main")
+
+
+def model_version(model_name: str) -> str:
+    """Identifies a model's outputs: its name, the backend it runs on and its revision.
+
+    Args:
+        model_name (str): Hugging Face model name.
+
+    Returns:
+        str: The version key, such as "name@torch:main".
+    """
+    return f"{model_name}@{_inference_backend}:{model_revision(model_name)}"
+
+
+def load_text_classifier(model_name: str, **kwargs: Any) -> Any:
+    """Build a text-classification pipeline on the configured inference backend.
+
+    Args:
+        model_name (str): Hugging Face model name.
+        **kwargs (Any): Extra pipeline arguments, such as top_k.
+
+    Returns:
+        Any: The pipeline.
+    """
+    if _inference_backend == "onnx":
+        return onnx_backend.load_pipeline(model_name, model_revision(model_name), **kwargs)
+    return pipeline("text-classification", model=model_name, revision=model_revision(model_name), **kwargs)
+
+
+class ModelRegistry:
+    """Loads each model once per process and shares it between callers.
+
+    Models are loaded lazily on first use, or up front with warm_up. A model only
+    counts as ready after a warm-up inference has run through it.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warmup_inputs: Dict[str, Any] = {}
+        self._models: Dict[str, Any] = {}
+        self._ready: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any], warmup_input: Any) -> None:
+        """Register a model.
+
+        Args:
+            name (str): Model name.
+            loader (Callable[[], Any]): Builds the model.
+            warmup_input (Any): Input passed to the model once after loading.
+        """
+        self._loaders[name] = loader
+        self._warmup_inputs[name] = warmup_input
+
+    def get(self, name: str) -> Any:
+        """Get a model, loading it on first use.
+
+        Args:
+            name (str): Model name.
+
+        Returns:
+            Any: The shared model.
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._loaders[name]()
+            return self._models[name]
+
+    def warm_up(self, names: Union[List[str], None] = None) -> None:
+        """Load models and run one inference through each.
+
+        Args:
+            names (List[str], optional): Models to warm up. Defaults to every registered model.
+        """
+        for name in names if names is not None else list(self._loaders):
+            self.get(name)(self._warmup_inputs[name])
+            self._ready[name] = True
+            print(f"Model {name} is warmed up")
+
+    def is_ready(self, name: str) -> bool:
+        """Whether a model has been loaded and warmed up.
+
+        Args:
+            name (str): Model name.
+
+        Returns:
+            bool: True once warm_up has finished for the model.
+        """
+        return self._ready.get(name, False)
+
+
+registry = ModelRegistry()
+registry.register(
+    EMOTION_MODEL,
+    lambda: load_text_classifier(EMOTION_MODEL, top_k=None),
+    "chill study vibes",
+)
+registry.register(
+    LYRICS_MODEL,
+    lambda: load_text_classifier(LYRICS_MODEL),
+    "hold on",
+)
+
+
+_emotion_batcher: Union[MicroBatcher, None] = None
+_emotion_batcher_lock = threading.Lock()
+_emotion_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+_emotion_max_wait_ms: float = DEFAULT_MAX_WAIT_MS
+
+
+def get_emotion_classifier() -> Any:
+    """The shared go_emotions text-classification pipeline."""
+    return registry.get(EMOTION_MODEL)
+
+
+def configure_emotion_batcher(max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS) -> None:
+    """Set how concurrent descriptions are batched before the batcher is first used.
+
+    Args:
+        max_batch_size (int): Most descriptions per forward pass. Defaults to DEFAULT_MAX_BATCH_SIZE.
+        max_wait_ms (float): Longest wait for more descriptions once one arrived. Defaults to DEFAULT_MAX_WAIT_MS.
+    """
+    global _emotion_batch_size, _emotion_max_wait_ms
+    _emotion_batch_size = max_batch_size
+    _emotion_max_wait_ms = max_wait_ms
+
+
+def get_emotion_batcher() -> MicroBatcher:
+    """Micro-batching front of the shared go_emotions classifier.
+
+    Calling it with one description returns that description's label/score list, while
+    descriptions arriving from other threads within max_wait_ms share the forward pass.
+    """
+    global _emotion_batcher
+    if _emotion_batcher is None:
+        with _emotion_batcher_lock:
+            if _emotion_batcher is None:
+                classifier = get_emotion_classifier()
+                _emotion_batcher = MicroBatcher(
+                    lambda descriptions: classifier(descriptions, batch_size=len(descriptions)),
+                    _emotion_batch_size,
+                    _emotion_max_wait_ms,
+                )
+    return _emotion_batcher
@@ -0,0 +1,204 @@
+import argparse
+import os
+from typing import Any, Dict, List, Tuple
+
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+except ImportError:
+    ORTModelForSequenceClassification = None
+
+from transformers import AutoTokenizer, pipeline
+
+ONNX_MODEL_DIRECTORY: str = "mood_estimators/onnx_models"
+QUANTIZED_FILE: str = "model_quantized.onnx"
+# Largest difference in any label's score the parity check accepts between the two backends
+SCORE_TOLERANCE: float = 0.05
+
+# Lines used by the parity check when no text file is given
+PARITY_SAMPLES: List[str] = [
+    "chill study vibes",
+    "sad rainy day",
+    "songs for the gym, loud and angry",
+    "happy road trip with friends",
+    "I'm nervous about tomorrow",
+    "Everybody hurts sometimes",
+    "So hold on, hold on",
+    "Push me to the edge",
+    "All my friends are dead",
+    "I like the way that she treat me",
+    "When your day is long and the night, the night is yours alone",
+    "Take comfort in your friends",
+]
+
+
+def require_optimum() -> None:
+    """Raise a helpful error if the ONNX Runtime backend is not installed."""
+    if ORTModelForSequenceClassification is None:
+        raise ImportError("The onnx inference backend needs optimum[onnxruntime]: python -m pip install optimum[onnxruntime]")
+
+
+def model_directory(model_name: str, revision: str = "main") -> str:
+    """Directory holding the exported ONNX files of a model revision.
+
+    Args:
+        model_name (str): Hugging Face model name.
+        revision (str): Hub revision the model was exported from. Defaults to "main".
+
+    Returns:
+        str: Export directory.
+    """
+    return os.path.join(ONNX_MODEL_DIRECTORY, f"{model_name.replace('/', '__')}@{revision}")
+
+
+def export_model(model_name: str, revision: str = "main") -> str:
+    """Export a model to ONNX and quantize its weights to int8 with dynamic quantization.
+
+    Args:
+        model_name (str): Hugging Face model name.
+        revision (str): Hub revision to export. Defaults to "main".
+
+    Returns:
+        str: Export directory.
+    """
+    require_optimum()
+    directory = model_directory(model_name, revision)
+    model = ORTModelForSequenceClassification.from_pretrained(model_name, revision=revision, export=True)
+    model.save_pretrained(directory)
+    AutoTokenizer.from_pretrained(model_name, revision=revision).save_pretrained(directory)
+
+    quantizer = ORTQuantizer.from_pretrained(model)
+    # Dynamic quantization: int8 weights, activations quantized on the fly, no calibration data
+    quantization_config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=directory, quantization_config=quantization_config)
+    print(f"Exported quantized {model_name}@{revision} to {directory}")
+    return directory
+
+
+def load_pipeline(model_name: str, revision: str = "main", **kwargs: Any) -> Any:
+    """Text-classification pipeline running the quantized ONNX model through ONNX Runtime.
+
+    Args:
+        model_name (str): Hugging Face model name.
+        revision (str): Hub revision the model was exported from. Defaults to "main".
+        **kwargs (Any): Extra pipeline arguments, such as top_k.
+
+    Returns:
+        Any: Pipeline with the same call interface as the PyTorch one.
+
+    Raises:
+        FileNotFoundError: If the model has not been exported yet.
+    """
+    require_optimum()
+    directory = model_directory(model_name, revision)
+    if not os.path.exists(os.path.join(directory, QUANTIZED_FILE)):
+        raise FileNotFoundError(
+            f"No quantized ONNX model for {model_name}@{revision} in {directory}, export it first: "
+            f"python -m mood_estimators.onnx_backend export --models {model_name}"
+        )
+    model = ORTModelForSequenceClassification.from_pretrained(directory, file_name=QUANTIZED_FILE)
+    tokenizer = AutoTokenizer.from_pretrained(directory)
+    return pipeline("text-classification", model=model, tokenizer=tokenizer, **kwargs)
+
+
+def label_scores(prediction: Any) -> Dict[str, float]:
+    """Scores keyed by label of one pipeline output, with or without top_k."""
+    if isinstance(prediction, list):
+        return {emotion["label"]: emotion["score"] for emotion in prediction}
+    return {prediction["label"]: prediction["score"]}
+
+
+def pipeline_output(model_name: str, scores: Dict[str, float]) -> Any:
+    """The part of a prediction the playlist pipeline acts on.
+
+    For go_emotions that is the quadrant group its top four labels map to, for the
+    lyrics model the most likely label.
+
+    Args:
+        model_name (str): Hugging Face model name.
+        scores (Dict[str, float]): Scores keyed by label.
+
+    Returns:
+        Any: The emotion group, or the top label.
+    """
+    try:
+        from model_registry import EMOTION_MODEL
+        from song_details_calc import map_emotions
+    except ImportError:
+        from mood_estimators.model_registry import EMOTION_MODEL
+        from mood_estimators.song_details_calc import map_emotions
+
+    labels = sorted(scores, key=scores.get, reverse=True)
+    if model_name == EMOTION_MODEL:
+        return map_emotions(labels)
+    return labels[0]
+
+
+def check_parity(model_name: str, texts: List[str], revision: str = "main", tolerance: float = SCORE_TOLERANCE) -> Tuple[float, float]:
+    """Compare the PyTorch and quantized ONNX pipelines on what the playlist pipeline uses.
+
+    An input agrees when both backends give the same pipeline_output and no label's
+    score differs by more than the tolerance.
+
+    Args:
+        model_name (str): Hugging Face model name.
+        texts (List[str]): Inputs to classify.
+        revision (str): Hub revision to compare. Defaults to "main".
+        tolerance (float): Largest accepted score difference per label. Defaults to SCORE_TOLERANCE.
+
+    Returns:
+        Tuple[float, float]: Fraction of inputs where both backends agree, and the largest score difference seen.
+    """
+    torch_scores = [label_scores(prediction) for prediction in pipeline("text-classification", model=model_name, revision=revision, top_k=None)(texts)]
+    onnx_scores = [label_scores(prediction) for prediction in load_pipeline(model_name, revision, top_k=None)(texts)]
+
+    agreed = 0
+    max_difference = 0.0
+    for text, torch_prediction, onnx_prediction in zip(texts, torch_scores, onnx_scores):
+        torch_output = pipeline_output(model_name, torch_prediction)
+        onnx_output = pipeline_output(model_name, onnx_prediction)
+        difference = max(abs(score - onnx_prediction.get(label, 0.0)) for label, score in torch_prediction.items())
+        max_difference = max(max_difference, difference)
+        if torch_output == onnx_output and difference <= tolerance:
+            agreed += 1
+        else:
+            print(f"Mismatch: {text!r} | torch: {torch_output} | onnx: {onnx_output} | score difference: {difference:.3f}")
+    agreement = agreed / max(1, len(texts))
+    print(f"{model_name}: {agreement:.1%} agreement over {len(texts)} inputs, largest score difference {max_difference:.3f}")
+    return agreement, max_difference
+
+
+def main() -> None:
+    """Export models to quantized ONNX or check their accuracy against PyTorch."""
+    try:
+        from model_registry import EMOTION_MODEL, LYRICS_MODEL, model_revision
+    except ImportError:
+        from mood_estimators.model_registry import EMOTION_MODEL, LYRICS_MODEL, model_revision
+
+    parser = argparse.ArgumentParser(description="Quantized ONNX Runtime inference backend")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="export and quantize the models")
+    export_parser.add_argument("--models", nargs="+", default=[EMOTION_MODEL, LYRICS_MODEL])
+    parity_parser = subparsers.add_parser("parity", help="compare ONNX outputs with PyTorch outputs")
+    parity_parser.add_argument("--models", nargs="+", default=[EMOTION_MODEL, LYRICS_MODEL])
+    parity_parser.add_argument("--texts", help="file with one input per line; defaults to built-in samples")
+    parity_parser.add_argument("--min-agreement", type=float, default=0.95)
+    parity_parser.add_argument("--tolerance", type=float, default=SCORE_TOLERANCE, help="largest accepted score difference per label")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        for model_name in args.models:
+            export_model(model_name, model_revision(model_name))
+        return
+
+    texts = PARITY_SAMPLES
+    if args.texts:
+        with open(args.texts, "r") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    failed = [model_name for model_name in args.models if check_parity(model_name, texts, model_revision(model_name), args.tolerance)[0] < args.min_agreement]
+    if failed:
+        raise SystemExit(f"Agreement below {args.min_agreement:.0%} for: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import json
+from typing import Any, Dict, List, Tuple, Union
+
+try:
+    import song_details_calc
+    from catalog_index import CatalogIndex
+    from model_registry import get_emotion_batcher
+    from prediction_cache import get_prediction_cache
+except ImportError:
+    from mood_estimators import song_details_calc
+    from mood_estimators.catalog_index import CatalogIndex
+    from mood_estimators.model_registry import get_emotion_batcher
+    from mood_estimators.prediction_cache import get_prediction_cache
+
+EMOTION_PREDICTIONS_FILE: str = "mood_estimators/emotion_predictions.json"
+FINISHED_PLAYLIST_FILE: str = "playlist_generated/finished_playlist.json"
+
+
+def predictions_to_dict(prediction: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Turn one go_emotions pipeline output into a label to score dict, most likely first.
+
+    Args:
+        prediction (List[Dict[str, Any]]): Label/score pairs for one text.
+
+    Returns:
+        Dict[str, float]: Scores keyed by label, ordered by descending score.
+    """
+    ordered = sorted(prediction, key=lambda emotion: emotion["score"], reverse=True)
+    return {emotion["label"]: emotion["score"] for emotion in ordered}
+
+
+def classify_description(description: str) -> Dict[str, float]:
+    """Classify a playlist description with the shared emotion classifier.
+
+    Repeated descriptions are served from the prediction cache. Concurrent misses are
+    padded into one batch by the classifier's micro-batcher.
+
+    Args:
+        description (str): Playlist description.
+
+    Returns:
+        Dict[str, float]: Scores keyed by label, ordered by descending score.
+    """
+    return get_prediction_cache().get_or_compute(
+        description,
+        lambda: predictions_to_dict(get_emotion_batcher()(description)),
+    )
+
+
+def rank_emotions(emotion_predictions: Dict[str, float], index: Union[CatalogIndex, None] = None) -> Tuple[List[str], List[Dict[str, str]]]:
+    """Map emotion predictions to quadrants and pick the playlist tracks.
+
+    Args:
+        emotion_predictions (Dict[str, float]): Scores keyed by label, ordered by descending score.
+        index (CatalogIndex, optional): In-memory catalog to rank against. Defaults to None.
+
+    Returns:
+        Tuple[List[str], List[Dict[str, str]]]: Emotion group and playlist tracks.
+    """
+    group = song_details_calc.map_emotions(list(emotion_predictions))
+    return group, song_details_calc.main(group, index=index)
+
+
+def dump_debug(emotion_predictions: Dict[str, float], tracks: List[Dict[str, str]]) -> None:
+    """Write the intermediate results to the JSON files the pipeline used to pass around.
+
+    Args:
+        emotion_predictions (Dict[str, float]): Scores keyed by label.
+        tracks (List[Dict[str, str]]): Playlist tracks.
+    """
+    with open(EMOTION_PREDICTIONS_FILE, 'w') as f:
+        json.dump(emotion_predictions, f, indent=4)
+    with open(FINISHED_PLAYLIST_FILE, 'w') as f:
+        json.dump(tracks, f, indent=4)
+    print("Debug output saved to", EMOTION_PREDICTIONS_FILE, "and", FINISHED_PLAYLIST_FILE)
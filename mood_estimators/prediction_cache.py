@@ -0,0 +1,167 @@
+from collections import OrderedDict
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple, Union
+
+try:
+    from model_registry import model_version, EMOTION_MODEL
+except ImportError:
+    from mood_estimators.model_registry import model_version, EMOTION_MODEL
+
+DEFAULT_MAX_ENTRIES: int = 4096
+DEFAULT_TTL_SECONDS: float = 7 * 24 * 60 * 60
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a description so near-identical ones share a cache entry.
+
+    Lowercases, collapses whitespace and drops surrounding punctuation.
+
+    Args:
+        text (str): Description.
+
+    Returns:
+        str: Normalized description.
+    """
+    return re.sub(r"\s+", " ", text.lower()).strip(" \t\n.,!?;:'\"")
+
+
+class PredictionCache:
+    """LRU cache with a TTL for emotion predictions, keyed by model version and normalized description.
+
+    The key names the model and the inference backend it runs on, so switching either
+    never serves the old model's predictions. With a sqlite_path, entries are also
+    written to a local SQLite file so they survive restarts; memory misses fall back
+    to the file before recomputing.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS, sqlite_path: Union[str, None] = None, model_name: str = EMOTION_MODEL):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db: Union[sqlite3.Connection, None] = None
+        if sqlite_path is not None:
+            self.db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+            self.db.commit()
+
+    def key(self, text: str) -> str:
+        """Cache key of a description under the model's current version."""
+        return f"{model_version(self.model_name)}\0{normalize_text(text)}"
+
+    def _expired(self, created: float) -> bool:
+        return time.time() - created > self.ttl_seconds
+
+    def _remember(self, key: str, created: float, value: Any) -> None:
+        self.entries[key] = (created, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, text: str) -> Any:
+        """Look up the cached prediction of a description.
+
+        Args:
+            text (str): Description.
+
+        Returns:
+            Any: The cached prediction, or None on a miss.
+        """
+        key = self.key(text)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self.entries[key]
+                entry = None
+            if entry is None and self.db is not None:
+                row = self.db.execute("SELECT created, value FROM predictions WHERE key = ?", (key,)).fetchone()
+                if row is not None and not self._expired(row[0]):
+                    entry = (row[0], json.loads(row[1]))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, entry[0], entry[1])
+            return entry[1]
+
+    def put(self, text: str, value: Any) -> None:
+        """Cache the prediction of a description.
+
+        Args:
+            text (str): Description.
+            value (Any): JSON-serializable prediction.
+        """
+        key = self.key(text)
+        created = time.time()
+        with self.lock:
+            self._remember(key, created, value)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO predictions (key, value, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), created),
+                )
+                self.db.execute("DELETE FROM predictions WHERE created < ?", (created - self.ttl_seconds,))
+                self.db.commit()
+
+    def get_or_compute(self, text: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached prediction, computing and caching it on a miss.
+
+        Args:
+            text (str): Description.
+            compute (Callable[[], Any]): Produces the prediction on a miss.
+
+        Returns:
+            Any: The prediction.
+        """
+        value = self.get(text)
+        if value is None:
+            value = compute()
+            self.put(text, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, hit rate and entries held in memory.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+            }
+
+
+prediction_cache = PredictionCache()
+
+
+def configure_prediction_cache(max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS, sqlite_path: Union[str, None] = None, model_name: str = EMOTION_MODEL) -> PredictionCache:
+    """Replace the shared prediction cache.
+
+    Args:
+        max_entries (int): Entries kept in memory. Defaults to DEFAULT_MAX_ENTRIES.
+        ttl_seconds (float): Age after which entries are recomputed. Defaults to DEFAULT_TTL_SECONDS.
+        sqlite_path (str, optional): SQLite file backing the cache. Defaults to memory only.
+        model_name (str): Model whose predictions are cached. Defaults to EMOTION_MODEL.
+
+    Returns:
+        PredictionCache: The new shared cache.
+    """
+    global prediction_cache
+    prediction_cache = PredictionCache(max_entries, ttl_seconds, sqlite_path, model_name)
+    return prediction_cache
+
+
+def get_prediction_cache() -> PredictionCache:
+    """The shared prediction cache."""
+    return prediction_cache
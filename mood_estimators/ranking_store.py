@@ -0,0 +1,112 @@
+import itertools
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from pymongo import MongoClient
+
+try:
+    import vector_ranker
+    from catalog_index import CatalogIndex
+    from catalog_version import get_catalog_version
+except ImportError:
+    from mood_estimators import vector_ranker
+    from mood_estimators.catalog_index import CatalogIndex
+    from mood_estimators.catalog_version import get_catalog_version
+
+# import_emotions_predict always yields four quadrant labels
+GROUP_SIZE: int = 4
+
+# Longest ranking stored per group; requests for more fall back to live scoring
+PRECOMPUTED_TOP_N: int = 500
+
+
+def all_groups(group_size: int = GROUP_SIZE) -> List[Tuple[str, ...]]:
+    """Every emotion group that can reach song_details_calc.main.
+
+    Args:
+        group_size (int): Number of emotions per group. Defaults to GROUP_SIZE.
+
+    Returns:
+        List[Tuple[str, ...]]: All ordered quadrant combinations (256 for groups of four).
+    """
+    return list(itertools.product(vector_ranker.QUADRANTS, repeat=group_size))
+
+
+def ranking_id(group: Sequence[str], catalog_version: int) -> str:
+    """Build the document ID of a stored ranking.
+
+    Args:
+        group (Sequence[str]): Emotions in ranking priority order.
+        catalog_version (int): Catalog version the ranking was computed from.
+
+    Returns:
+        str: Ranking document ID.
+    """
+    return f"{catalog_version}:{','.join(group)}"
+
+
+def precompute_rankings(db: MongoClient, numReturned: int = PRECOMPUTED_TOP_N) -> int:
+    """Rank the catalog for every emotion group and store the results.
+
+    Rankings for older catalog versions are removed.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+        numReturned (int): Number of top songs to store per group. Defaults to PRECOMPUTED_TOP_N.
+
+    Returns:
+        int: The catalog version the rankings were stored under.
+    """
+    # Quadrant scores are computed once by the index; each group only reorders columns
+    index = CatalogIndex.from_db(db)
+    catalog_version = index.catalog_version
+
+    for group in all_groups():
+        top_songs = index.rank(list(group), numReturned)
+        db.rankings.replace_one(
+            {"_id": ranking_id(group, catalog_version)},
+            {
+                "group": list(group),
+                "catalog_version": catalog_version,
+                "top_n": numReturned,
+                "tracks": top_songs,
+                "time": datetime.now(),
+            },
+            upsert=True,
+        )
+
+    # Only older versions: a slower run for an older catalog must not delete a newer run's rankings
+    db.rankings.delete_many({"catalog_version": {"$lt": catalog_version}})
+    return catalog_version
+
+
+def get_ranking(db: MongoClient, group: Sequence[str], numReturned: int = PRECOMPUTED_TOP_N) -> Optional[List[Dict[str, str]]]:
+    """Look up the stored ranking of a group for the current catalog version.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+        group (Sequence[str]): Emotions in ranking priority order.
+        numReturned (int): Number of top songs needed. Defaults to PRECOMPUTED_TOP_N.
+
+    Returns:
+        Optional[List[Dict[str, str]]]: Top songs, best first, or None if no usable ranking is stored.
+    """
+    stored = db.rankings.find_one({"_id": ranking_id(group, get_catalog_version(db))})
+    if stored is None or stored["top_n"] < numReturned:
+        return None
+    return stored["tracks"][:numReturned]
+
+
+def main() -> None:
+    """Offline job: precompute rankings for every emotion group."""
+    try:
+        from song_details_calc import get_db_connection
+    except ImportError:
+        from mood_estimators.song_details_calc import get_db_connection
+
+    client = get_db_connection()
+    catalog_version = precompute_rankings(client)
+    print(f"Stored {len(all_groups())} rankings for catalog version {catalog_version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,17 @@ import certifi
 from pymongo import MongoClient
 from typing import List, Dict, Tuple, Optional
 
+try:
+    import centroid_store
+    import vector_codec
+    from catalog_version import bump_catalog_version
+    from vector_snapshot import export_snapshot
+except ImportError:
+    from mood_estimators import centroid_store
+    from mood_estimators import vector_codec
+    from mood_estimators.catalog_version import bump_catalog_version
+    from mood_estimators.vector_snapshot import export_snapshot
+
 MONGO_URL = "soundsmith.x5y65kb.mongodb.net"
 
 def import_tracks(db: MongoClient, updateAll: bool = False) -> List[dict]:
@@ -193,7 +204,7 @@ def load_vectors(db: MongoClient, vector: dict, id: str) -> None:
     # Find or create track
     mongo_track = db.tracks.find_one_and_update(
         track_query,
-        {"$set": {"vector": vector}},
+        {"$set": {"vector": vector, **vector_codec.vector_fields(vector)}},
         upsert=True,
         return_document=True,
     )
@@ -220,5 +231,12 @@ def main():
         # Load vectors into the database for each song
         load_vectors(client, song[0], song[1])
 
+    # Vectors changed, so anything derived from them is stale
+    if song_info:
+        bump_catalog_version(client)
+        centroid_store.rebuild_centroids(client)
+        # API workers memory-map this snapshot instead of pulling vectors from MongoDB
+        export_snapshot(client)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
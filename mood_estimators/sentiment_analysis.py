@@ -1,11 +1,24 @@
+import argparse
 import os
-from typing import Union, List, Dict, Any
-import bertai
+from typing import Union, List, Dict, Any, Iterator, Tuple
+try:
+    import bertai
+    from line_cache import get_line_cache
+except ImportError:
+    from mood_estimators import bertai
+    from mood_estimators.line_cache import get_line_cache
 import dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import CursorNotFound
 import certifi
 
 MONGO_URL = "soundsmith.x5y65kb.mongodb.net"
+# Songs fetched per cursor round trip and analysed together in streaming mode
+STREAM_BATCH_SIZE = 256
+# Analyses accumulated before one unordered bulk write
+FLUSH_SIZE = 1000
+# Written by process_all for songs whose lyrics could not be analysed
+DEFAULT_ANALYSIS = {"positive_percentage": 0, "negative_percentage": 0, "mixed_percentage": 0, "no_impact_percentage": 0}
 
 def get_db_connection() -> Union[MongoClient, None]:
     """Creates and returns db connection.
@@ -56,9 +69,119 @@ def load_analysis(db: MongoClient, id: str, percentage: Dict[str, Any]) -> None:
         return_document=True,
     )
 
-def main() -> None:
-    """Main function for processing lyrics and loading sentiment analysis into the database."""
-    client = get_db_connection()
+def stream_lyrics(db: MongoClient, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Stream lyrics still missing an analysis in batches, without loading them all.
+
+    Only track_id and lyrics are fetched, in _id order. If the server drops the cursor
+    while a batch is being analysed, a new cursor continues after the last batch yielded.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+        batch_size (int): Songs per batch and per cursor round trip. Defaults to STREAM_BATCH_SIZE.
+
+    Yields:
+        List[Dict[str, Any]]: A batch of lyrics documents.
+    """
+    last_id = None
+    while True:
+        query = {"sentient_analysis": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        cursor = db.lyrics.find(query, {"track_id": 1, "lyrics": 1}, batch_size=batch_size).sort("_id", 1)
+        batch = []
+        try:
+            for lyric in cursor:
+                batch.append(lyric)
+                if len(batch) == batch_size:
+                    yield batch
+                    last_id = batch[-1]["_id"]
+                    batch = []
+        except CursorNotFound:
+            # Idle too long during inference; reopen after the last batch yielded
+            continue
+        finally:
+            cursor.close()
+        if batch:
+            yield batch
+        return
+
+def flush_analyses(db: MongoClient, analyses: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """Write sentiment analyses in one unordered bulk write.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+        analyses (List[Tuple[str, Dict[str, Any]]]): (track_id, analysis) pairs.
+    """
+    if analyses:
+        db.lyrics.bulk_write(
+            [UpdateOne({"track_id": track_id}, {"$set": {"sentient_analysis": analysis}}, upsert=True) for track_id, analysis in analyses],
+            ordered=False,
+        )
+
+def analyze_lyrics(lyrics: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str]]:
+    """Analyse many songs at once, classifying their lines in shared batches.
+
+    If the shared batch fails, each song is analysed on its own. Songs that still fail
+    get no analysis, so they stay missing and a later run picks them up again.
+
+    Args:
+        lyrics (List[Dict[str, Any]]): Lyrics documents with track_id and lyrics.
+
+    Returns:
+        Tuple[List[Tuple[str, Dict[str, Any]]], List[str]]: (track_id, analysis) pairs and the track IDs that failed.
+    """
+    try:
+        moods = bertai.get_lyrics_moods([each_lyric["lyrics"] for each_lyric in lyrics])
+        return [(each_lyric["track_id"], mood) for each_lyric, mood in zip(lyrics, moods)], []
+    except Exception as e:
+        print(f"Batch of {len(lyrics)} songs failed ({type(e).__name__}: {e}), analysing them one by one")
+
+    analyses = []
+    failed = []
+    for each_lyric in lyrics:
+        try:
+            analyses.append((each_lyric["track_id"], bertai.get_lyrics_mood(each_lyric["lyrics"])))
+        except Exception as e:
+            print(f"Song {each_lyric.get('track_id')} failed: {e}")
+            failed.append(each_lyric["track_id"])
+    return analyses, failed
+
+def stream_main(client: MongoClient, batch_size: int = STREAM_BATCH_SIZE, flush_size: int = FLUSH_SIZE) -> None:
+    """Analyse lyrics from a batched cursor and write the results in bulk.
+
+    Memory holds one cursor batch and at most flush_size pending analyses, whatever the
+    size of the collection. Songs that fail are left without an analysis for the next run.
+
+    Args:
+        client (MongoClient): The MongoDB client.
+        batch_size (int): Songs per cursor batch. Defaults to STREAM_BATCH_SIZE.
+        flush_size (int): Analyses per bulk write. Defaults to FLUSH_SIZE.
+    """
+    pending = []
+    songs = 0
+    flushes = 0
+    failed = 0
+    for lyrics in stream_lyrics(client, batch_size):
+        analyses, failed_ids = analyze_lyrics(lyrics)
+        pending.extend(analyses)
+        songs += len(analyses)
+        failed += len(failed_ids)
+        if len(pending) >= flush_size:
+            flush_analyses(client, pending)
+            flushes += 1
+            pending = []
+            print(f"Analysed {songs} songs ({failed} failed)")
+    if pending:
+        flush_analyses(client, pending)
+        flushes += 1
+    print(f"Analysed {songs} songs ({failed} failed) in {flushes} bulk writes")
+
+def process_all(client: MongoClient) -> None:
+    """Analyse every lyric one song at a time, updating each song as it finishes.
+
+    Args:
+        client (MongoClient): The MongoDB client.
+    """
     lyrics = import_lyrics(client)
 
     for each_lyric in lyrics:
@@ -68,8 +191,28 @@ def main() -> None:
         except Exception as e:
             print(e)
             # If error, set default values
-            sentient_analysis = {"positive_percentage": 0, "negative_percentage": 0, "mixed_percentage": 0, "no_impact_percentage": 0}
+            sentient_analysis = dict(DEFAULT_ANALYSIS)
             load_analysis(client, each_lyric["track_id"], sentient_analysis)
 
+def main(stream: bool = False) -> None:
+    """Main function for processing lyrics and loading sentiment analysis into the database.
+
+    Args:
+        stream (bool): Stream lyrics from a batched cursor and bulk write the results instead
+            of loading every lyric and updating songs one at a time. Defaults to False.
+    """
+    client = get_db_connection()
+    if stream:
+        stream_main(client)
+    else:
+        process_all(client)
+
+    # Lines seen in earlier songs or runs were served from the line cache
+    line_cache = get_line_cache()
+    if line_cache is not None:
+        print(f"Line cache: {line_cache.stats()}")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load lyric sentiment analyses into the database")
+    parser.add_argument("--stream", action="store_true", help="stream lyrics from a batched cursor and bulk write the results")
+    main(parser.parse_args().stream)
\ No newline at end of file
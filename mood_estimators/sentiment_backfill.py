@@ -0,0 +1,197 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List
+
+from pymongo import UpdateOne
+
+try:
+    import sentiment_analysis
+    from model_registry import registry, LYRICS_MODEL
+except ImportError:
+    from mood_estimators import sentiment_analysis
+    from mood_estimators.model_registry import registry, LYRICS_MODEL
+
+DEFAULT_CHECKPOINT_DIRECTORY: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backfill_checkpoint")
+DEFAULT_BATCH_SIZE: int = 64
+PLAN_FILE: str = "plan.json"
+DONE_FILE: str = "done.jsonl"
+
+# Per-process state, set up once by init_worker
+_db = None
+
+
+def init_worker(threads: int) -> None:
+    """Give a worker process its own database connection and warmed-up model.
+
+    Args:
+        threads (int): Intra-op threads for the model, so workers do not oversubscribe the CPU.
+    """
+    global _db
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _db = sentiment_analysis.get_db_connection()
+    registry.warm_up([LYRICS_MODEL])
+
+
+def process_batch(batch_index: int, track_ids: List[str]) -> Dict[str, Any]:
+    """Analyse one batch of songs and write the results in one unordered bulk write.
+
+    Songs that fail are not written and are returned for a later retry.
+
+    Args:
+        batch_index (int): Position of the batch in the plan.
+        track_ids (List[str]): Songs in the batch.
+
+    Returns:
+        Dict[str, Any]: The batch index, number of songs written and track IDs that failed.
+    """
+    lyrics = list(_db.lyrics.find({"track_id": {"$in": track_ids}}, {"_id": 0, "track_id": 1, "lyrics": 1}))
+    analyses, failed = sentiment_analysis.analyze_lyrics(lyrics)
+    if analyses:
+        _db.lyrics.bulk_write(
+            [UpdateOne({"track_id": track_id}, {"$set": {"sentient_analysis": analysis}}, upsert=True) for track_id, analysis in analyses],
+            ordered=False,
+        )
+    return {"batch": batch_index, "songs": len(analyses), "failed": failed}
+
+
+def load_plan(db, checkpoint_directory: str, batch_size: int) -> List[List[str]]:
+    """Load the batches of this backfill, or plan them on the first run.
+
+    The plan fixes which songs belong to which batch, so a resumed run continues with
+    exactly the batches that did not finish.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+        checkpoint_directory (str): Directory holding the checkpoint.
+        batch_size (int): Songs per batch on the first run.
+
+    Returns:
+        List[List[str]]: Track IDs of each batch.
+    """
+    plan_path = os.path.join(checkpoint_directory, PLAN_FILE)
+    if os.path.exists(plan_path):
+        with open(plan_path, "r") as f:
+            return json.load(f)
+
+    track_ids = [
+        lyric["track_id"]
+        for lyric in db.lyrics.find({"sentient_analysis": {"$exists": False}}, {"_id": 0, "track_id": 1}).sort("_id", 1)
+    ]
+    plan = [track_ids[start:start + batch_size] for start in range(0, len(track_ids), batch_size)]
+    os.makedirs(checkpoint_directory, exist_ok=True)
+    with open(plan_path + ".tmp", "w") as f:
+        json.dump(plan, f)
+    os.replace(plan_path + ".tmp", plan_path)
+    return plan
+
+
+def load_done(checkpoint_directory: str) -> Dict[int, List[str]]:
+    """Batches a previous run finished, with the songs in each that still need a retry.
+
+    A batch that ran again supersedes its earlier entries, so a retry that succeeds
+    clears the batch's failures.
+
+    Args:
+        checkpoint_directory (str): Directory holding the checkpoint.
+
+    Returns:
+        Dict[int, List[str]]: Track IDs still failing, keyed by finished batch index.
+    """
+    done_path = os.path.join(checkpoint_directory, DONE_FILE)
+    if not os.path.exists(done_path):
+        return {}
+    done = {}
+    with open(done_path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash; its batch runs again
+                continue
+            done[entry["batch"]] = entry.get("failed", [])
+    return done
+
+
+def run_backfill(workers: int, batch_size: int = DEFAULT_BATCH_SIZE, checkpoint_directory: str = DEFAULT_CHECKPOINT_DIRECTORY) -> None:
+    """Analyse every song without a sentiment analysis across worker processes.
+
+    Each finished batch is appended to the checkpoint with the songs that failed. A rerun
+    with the same checkpoint directory resumes with the batches that are still missing and
+    retries the failed songs of finished ones. Failed songs are never written, so a new plan
+    picks them up as well.
+
+    Args:
+        workers (int): Worker processes, each loading its own model.
+        batch_size (int): Songs per batch. Defaults to DEFAULT_BATCH_SIZE.
+        checkpoint_directory (str): Directory holding the checkpoint. Defaults to DEFAULT_CHECKPOINT_DIRECTORY.
+    """
+    db = sentiment_analysis.get_db_connection()
+    plan = load_plan(db, checkpoint_directory, batch_size)
+    done = load_done(checkpoint_directory)
+    # Unfinished batches run in full, finished ones only for their failed songs
+    work = {i: done.get(i, track_ids) for i, track_ids in enumerate(plan) if done.get(i, track_ids)}
+    total_songs = sum(len(track_ids) for track_ids in work.values())
+    retries = sum(1 for i in work if i in done)
+    print(f"{len(done)} of {len(plan)} batches already done, {total_songs} songs to go ({retries} batches to retry)")
+    if not work:
+        return
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    songs = 0
+    failed = 0
+    start = time.perf_counter()
+    # Spawned workers do not inherit the parent's threads or half-initialised libraries
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker, initargs=(threads,)) as pool, \
+            open(os.path.join(checkpoint_directory, DONE_FILE), "a") as done_file:
+        futures = {pool.submit(process_batch, i, track_ids): i for i, track_ids in work.items()}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # A database or worker error fails the whole batch; the next run retries it
+                print(f"Batch {i} failed: {type(e).__name__}: {e}")
+                result = {"batch": i, "songs": 0, "failed": work[i], "error": f"{type(e).__name__}: {e}"}
+            done_file.write(json.dumps(result) + "\n")
+            done_file.flush()
+            os.fsync(done_file.fileno())
+
+            songs += result["songs"]
+            failed += len(result["failed"])
+            elapsed = time.perf_counter() - start
+            print(f"Batch {result['batch']}: {songs}/{total_songs} songs, {songs / elapsed:.1f} songs/sec, {failed} failed")
+
+    elapsed = time.perf_counter() - start
+    print(f"Analysed {songs} songs in {elapsed:.1f}s ({songs / elapsed:.1f} songs/sec), {failed} failed")
+    if failed:
+        print("Run again with the same checkpoint to retry the failed songs")
+
+
+def main() -> None:
+    """Run or resume the lyric sentiment backfill."""
+    parser = argparse.ArgumentParser(description="Multi-process lyric sentiment backfill with checkpoint and resume")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="songs per batch; only used when planning a new run")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_DIRECTORY, help="checkpoint directory")
+    parser.add_argument("--restart", action="store_true", help="discard the checkpoint and plan a new run")
+    args = parser.parse_args()
+
+    if args.restart:
+        for name in (PLAN_FILE, DONE_FILE):
+            path = os.path.join(args.checkpoint, name)
+            if os.path.exists(path):
+                os.remove(path)
+    run_backfill(args.workers, args.batch_size, args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
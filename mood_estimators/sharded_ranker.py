@@ -0,0 +1,93 @@
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple, Union
+import numpy as np
+
+try:
+    import vector_ranker
+except ImportError:
+    from mood_estimators import vector_ranker
+
+# Shared-memory blocks attached by this worker process, by name
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _shard_top_k(shm_name: str, shape: Tuple[int, int], start: int, end: int, group: List[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rank one shard of the shared quadrant scores. Runs in a worker process.
+
+    Args:
+        shm_name (str): Name of the shared-memory block holding the scores.
+        shape (Tuple[int, int]): Shape of the whole score matrix.
+        start (int): First row of the shard.
+        end (int): Row after the last row of the shard.
+        group (List[str]): Emotions in ranking priority order.
+        k (int): Number of rows to keep.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Global row indices of the shard's top k and their rank keys.
+    """
+    if shm_name not in _attached:
+        _attached[shm_name] = shared_memory.SharedMemory(name=shm_name)
+    scores = np.ndarray(shape, dtype=np.float32, buffer=_attached[shm_name].buf)
+
+    ranks = vector_ranker.group_scores(scores[start:end], group)
+    top = vector_ranker.top_k_indices(ranks, k)
+    return top + start, ranks[top]
+
+
+def _release(pool: ProcessPoolExecutor, shm: shared_memory.SharedMemory) -> None:
+    """Stop the workers and free the shared memory of a ShardedRanker."""
+    pool.shutdown()
+    shm.close()
+    shm.unlink()
+
+
+class ShardedRanker:
+    """Ranks precomputed quadrant scores split across a pool of worker processes.
+
+    The N x len(QUADRANTS) scores from vector_ranker.centroid_scores are copied once into
+    shared memory, so workers read them without pickling and never recompute similarities.
+    Each worker ranks a contiguous shard and the per-shard top k are merged. The workers
+    and shared memory are released by close, or when the ranker is garbage-collected.
+    """
+
+    def __init__(self, scores: np.ndarray, workers: Union[int, None] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.shape = (int(scores.shape[0]), int(scores.shape[1]))
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, self.shape[0] * self.shape[1] * 4))
+        np.ndarray(self.shape, dtype=np.float32, buffer=self.shm.buf)[:] = scores
+        self.bounds = np.linspace(0, self.shape[0], self.workers + 1).astype(int)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._finalizer = weakref.finalize(self, _release, self.pool, self.shm)
+
+    def top_k(self, group: List[str], k: int) -> np.ndarray:
+        """Indices of the k best rows, identical to vector_ranker.top_k_indices on the whole matrix.
+
+        Args:
+            group (List[str]): Emotions in ranking priority order.
+            k (int): Number of rows to return.
+
+        Returns:
+            np.ndarray: Row indices, best first.
+        """
+        futures = [
+            self.pool.submit(_shard_top_k, self.shm.name, self.shape, int(start), int(end), group, k)
+            for start, end in zip(self.bounds[:-1], self.bounds[1:])
+            if end > start
+        ]
+        results = [future.result() for future in futures]
+        if not results:
+            return np.zeros(0, dtype=np.intp)
+
+        indices = np.concatenate([indices for indices, _ in results])
+        ranks = np.concatenate([ranks for _, ranks in results])
+        # Restore row order so ties break exactly as in the single-process path
+        order = np.argsort(indices, kind="stable")
+        indices, ranks = indices[order], ranks[order]
+        return indices[vector_ranker.top_k_indices(ranks, k)]
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory."""
+        self._finalizer()
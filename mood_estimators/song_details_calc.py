@@ -19,9 +19,19 @@ sp = spotipy.Spotify(auth_manager=SpotifyOAuth(client_id= client_id,
                                                scope='playlist-modify-public'))
 
 try:
-    from max_heap import MaxHeap
+    import vector_ranker
+    import vector_codec
+    import centroid_store
+    import ranking_store
+    from catalog_index import CatalogIndex
+    from sharded_ranker import ShardedRanker
 except ImportError:
-    from mood_estimators.max_heap import MaxHeap
+    from mood_estimators import vector_ranker
+    from mood_estimators import vector_codec
+    from mood_estimators import centroid_store
+    from mood_estimators import ranking_store
+    from mood_estimators.catalog_index import CatalogIndex
+    from mood_estimators.sharded_ranker import ShardedRanker
 
 MONGO_URL: str = "soundsmith.x5y65kb.mongodb.net"
 
@@ -88,6 +98,27 @@ def cosine_similarity(vector1: np.ndarray, vector2: np.ndarray) -> float:
     except Exception as e:
         print(e)
 
+def map_emotions(labels: List[str]) -> List[str]:
+    """Map the top four go_emotions labels to emotion quadrants.
+
+    Args:
+        labels (List[str]): Classifier labels, most likely first.
+
+    Returns:
+        list: List of top predicted emotion quadrants.
+    """
+    top_emotions = []
+    for key in labels[:4]:
+        if (key == "joy") or (key == "amusement") or (key == "surprise") or (key == "love") or (key == "excitement") or (key == "gratitude") or (key == "pride") or (key == "relief"):
+            top_emotions.append("happy")
+        elif (key == "sadness") or (key == "disappointment") or (key == "grief") or (key == "remorse") or (key == "embarrassment"):
+            top_emotions.append("sad")
+        elif (key == "neutral") or (key == "curiosity") or (key == "approval") or (key == "admiration") or (key == "realization") or (key == "optimism") or (key == "desire"):
+            top_emotions.append("chill")
+        elif (key == "anger") or (key == "annoyance") or (key == "disapproval") or (key == "disgust") or (key == "fear") or (key == "confusion") or (key == "caring") or (key == "nervousness"):
+            top_emotions.append("stressing")
+    return top_emotions
+
 def import_emotions_predict(json_file_path: str) -> List[str] | str:
     """Import predicted emotions from a JSON file.
 
@@ -97,23 +128,10 @@ def import_emotions_predict(json_file_path: str) -> List[str] | str:
     Returns:
         x | str: List of top predicted emotions or error message.
     """
-    top_emotions = []
     try:
         with open(json_file_path, 'r') as file:
             data = json.load(file)
-            keys = list(data.keys())[:4]
-
-            for key in keys:
-                if (key == "joy") or (key == "amusement") or (key == "surprise") or (key == "love") or (key == "excitement") or (key == "gratitude") or (key == "pride") or (key == "relief"):
-                    top_emotions.append("happy")
-                elif (key == "sadness") or (key == "disappointment") or (key == "grief") or (key == "remorse") or (key == "embarrassment"):
-                    top_emotions.append("sad")
-                elif (key == "neutral") or (key == "curiosity") or (key == "approval") or (key == "admiration") or (key == "realization") or (key == "optimism") or (key == "desire"):
-                    top_emotions.append("chill")
-                elif (key == "anger") or (key == "annoyance") or (key == "disapproval") or (key == "disgust") or (key == "fear") or (key == "confusion") or (key == "caring") or (key == "nervousness"):
-                    top_emotions.append("stressing")
-
-        return top_emotions
+            return map_emotions(list(data.keys()))
 
     except FileNotFoundError:
         return "File not found"
@@ -153,55 +171,55 @@ def create_playlist(songs_dict: List[Dict[str, str]]) -> None:
     
     sp.playlist_add_items(playlist_id, song_ids)
 
-def main(group: List[str], numReturned: int = 500, playlistNum: int = 40) -> List[Dict[str, str]]:
+def main(group: List[str], numReturned: int = 500, playlistNum: int = 40, index: Union[CatalogIndex, None] = None, workers: int = 1) -> List[Dict[str, str]]:
     """Main function to calculate similarity rankings of songs based on emotions.
 
     Args:
         group (list): List of emotions.
         numReturned (int): Number of top songs to return. Defaults to 500.
         playlistNum (int): Number of songs in the playlist. Defaults to 40.
+        index (CatalogIndex, optional): In-memory catalog to rank against without touching the database.
+            Defaults to None.
+        workers (int): Number of processes to shard scoring across when ranking from the database.
+            Defaults to 1.
 
     Returns:
         list: List of dictionaries containing top songs.
     """
-    client: Union[MongoClient, None] = get_db_connection()
-    dict_DB: List[Dict[str, Any]] = import_tracks(client)
-    heap: MaxHeap = MaxHeap()
-
-    stand_vect_dict: Dict[str, List[Tuple[Dict[str, Any], str]]] = {
-        "happy" : import_standard_songs(client, "happy"),
-        "sad": import_standard_songs(client, "sad"),
-        "chill": import_standard_songs(client, "chill"),
-        "stressing": import_standard_songs(client, "stressing"),
-    }
-
-    for track in dict_DB:
-        P1: np.ndarray = np.array(list(track["vector"].values()))
-        
-        rank: List[float] = []
-        for each_sentiment in group:
-            for quadrant in stand_vect_dict:
-                if quadrant == each_sentiment:
-                    sum_: float = 0
-
-                    for each_song in stand_vect_dict[quadrant]:
-                        P2: np.ndarray = np.array(list(each_song[0].values()))
-                        sum_ += cosine_similarity(P1, P2)
-
-                    similarity: float = round((sum_ / len(stand_vect_dict[quadrant])), 4)
-                    rank.append(similarity)
-
-        heap.insert((rank[0], rank[1], rank[2], rank[3], track["spotify"]["track_id"], track["track_name"], track["artist_name"]))
-
-    top_songs: List[Dict[str, str]] = []
-    
-    for i in range(numReturned):
-        each_track: Tuple[float, float, float, float, str, str, str] = heap.extract_max()
-        track_id, track_name, artist_name = each_track[4], each_track[5], each_track[6]
+    top_songs: Union[List[Dict[str, str]], None] = None
+
+    if index is not None:
+        top_songs = index.rank(group, numReturned)
+    else:
+        client: Union[MongoClient, None] = get_db_connection()
+
+        # Rankings precomputed by ranking_store for the current catalog skip scoring entirely
+        top_songs = ranking_store.get_ranking(client, group, numReturned)
+
+    if top_songs is None:
+        dict_DB: List[Dict[str, Any]] = import_tracks(client)
+
+        # One stored centroid per quadrant stands in for averaging over every standard song
+        centroids: Dict[str, np.ndarray] = centroid_store.load_centroids(client)
+
+        track_matrix: np.ndarray = vector_codec.track_matrix(dict_DB)
+
+        if workers > 1:
+            # Split the catalog across worker processes and merge their top songs
+            ranker: ShardedRanker = ShardedRanker(vector_ranker.centroid_scores(track_matrix, centroids), workers)
+            try:
+                top_indices: np.ndarray = ranker.top_k(group, numReturned)
+            finally:
+                ranker.close()
+            top_songs = [{"track_id": dict_DB[i]["spotify"]["track_id"], "track_name": dict_DB[i]["track_name"], "artist_name": dict_DB[i]["artist_name"]} for i in top_indices]
+        else:
+            # Score every track against every centroid in one batched pass
+            top_songs = vector_ranker.rank_tracks(dict_DB, track_matrix, centroids, group, numReturned)
+
+    for i, each_track in enumerate(top_songs):
         # Encode the strings as ASCII before printing
-        print(i, ") ", track_id.encode('ascii', 'ignore'), track_name.encode('ascii', 'ignore'), artist_name.encode('ascii', 'ignore'))
-        top_songs.append({"track_id": track_id, "track_name": track_name, "artist_name": artist_name})
-    
+        print(i, ") ", each_track["track_id"].encode('ascii', 'ignore'), each_track["track_name"].encode('ascii', 'ignore'), each_track["artist_name"].encode('ascii', 'ignore'))
+
     return random.sample(top_songs, playlistNum)
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+from typing import Dict, List, Any, Sequence, Tuple
+import numpy as np
+from bson.binary import Binary
+from pymongo import MongoClient, UpdateOne
+
+# Dimension layout of every packed vector schema. Never edit a released schema;
+# add a new version and run the migration instead.
+VECTOR_SCHEMAS: Dict[int, Tuple[str, ...]] = {
+    1: ("happy", "sad", "intense", "mild", "danceability", "speechiness"),
+}
+VECTOR_SCHEMA_VERSION: int = 1
+
+# Little-endian float32, independent of the host byte order
+VECTOR_DTYPE = np.dtype("<f4")
+
+MIGRATION_BATCH_SIZE: int = 1000
+
+
+def pack_vectors(vectors: Sequence[Dict[str, float]]) -> np.ndarray:
+    """Pack mood vector documents into a contiguous float32 matrix in the current schema's order.
+
+    Args:
+        vectors (Sequence[Dict[str, float]]): Mood vectors keyed by dimension name.
+
+    Returns:
+        np.ndarray: Matrix of shape (len(vectors), len(schema)).
+    """
+    dimensions = VECTOR_SCHEMAS[VECTOR_SCHEMA_VERSION]
+    matrix = np.zeros((len(vectors), len(dimensions)), dtype=np.float32)
+    for row, vector in enumerate(vectors):
+        matrix[row] = [vector.get(dimension, 0) for dimension in dimensions]
+    return matrix
+
+
+def encode_vector(vector: Dict[str, float]) -> Binary:
+    """Pack a mood vector into BSON binary using the current schema.
+
+    Args:
+        vector (Dict[str, float]): Mood vector keyed by dimension name.
+
+    Returns:
+        Binary: Packed float32 vector.
+    """
+    dimensions = VECTOR_SCHEMAS[VECTOR_SCHEMA_VERSION]
+    return Binary(np.array([vector.get(dimension, 0) for dimension in dimensions], dtype=VECTOR_DTYPE).tobytes())
+
+
+def vector_fields(vector: Dict[str, float]) -> Dict[str, Any]:
+    """Track fields storing a mood vector in packed form.
+
+    Args:
+        vector (Dict[str, float]): Mood vector keyed by dimension name.
+
+    Returns:
+        Dict[str, Any]: "vector_bin" and "vector_schema" fields to $set on the track.
+    """
+    return {"vector_bin": encode_vector(vector), "vector_schema": VECTOR_SCHEMA_VERSION}
+
+
+def decode_vectors(binaries: List[bytes]) -> np.ndarray:
+    """Decode packed vectors of the current schema into one matrix.
+
+    Args:
+        binaries (List[bytes]): Packed vectors.
+
+    Returns:
+        np.ndarray: Float32 matrix of shape (len(binaries), len(schema)).
+    """
+    dimensions = len(VECTOR_SCHEMAS[VECTOR_SCHEMA_VERSION])
+    return np.frombuffer(b"".join(binaries), dtype=VECTOR_DTYPE).reshape(len(binaries), dimensions).astype(np.float32)
+
+
+def is_packed(track: Dict[str, Any]) -> bool:
+    """Whether a track document holds a packed vector of the current schema.
+
+    Args:
+        track (Dict[str, Any]): Track document.
+
+    Returns:
+        bool: True if "vector_bin" can be decoded directly.
+    """
+    return track.get("vector_schema") == VECTOR_SCHEMA_VERSION and "vector_bin" in track
+
+
+def track_matrix(tracks: List[Dict[str, Any]]) -> np.ndarray:
+    """Vector matrix of track documents, decoding packed vectors and packing legacy ones.
+
+    Args:
+        tracks (List[Dict[str, Any]]): Track documents with "vector_bin" or "vector".
+
+    Returns:
+        np.ndarray: Float32 matrix with one row per track.
+    """
+    packed = [i for i, track in enumerate(tracks) if is_packed(track)]
+    legacy = [i for i, track in enumerate(tracks) if not is_packed(track)]
+
+    matrix = np.zeros((len(tracks), len(VECTOR_SCHEMAS[VECTOR_SCHEMA_VERSION])), dtype=np.float32)
+    if packed:
+        matrix[packed] = decode_vectors([tracks[i]["vector_bin"] for i in packed])
+    if legacy:
+        matrix[legacy] = pack_vectors([tracks[i]["vector"] for i in legacy])
+    return matrix
+
+
+def find_track_vectors(db: MongoClient, query: Dict[str, Any], projection: Dict[str, int]) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Fetch tracks and their vector matrix, transferring packed vectors where available.
+
+    Migrated tracks are fetched with only the packed vector. Tracks that still hold only the
+    legacy sub-document are fetched with it in a second query.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+        query (Dict[str, Any]): Filter on the tracks collection.
+        projection (Dict[str, int]): Fields to return besides the vector.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], np.ndarray]: Track documents and their vector matrix.
+    """
+    packed = list(db.tracks.find(
+        {"$and": [query, {"vector_schema": VECTOR_SCHEMA_VERSION}]},
+        {**projection, "vector_bin": 1, "vector_schema": 1},
+    ))
+    legacy = list(db.tracks.find(
+        {"$and": [query, {"vector": {"$exists": True}}, {"vector_schema": {"$ne": VECTOR_SCHEMA_VERSION}}]},
+        {**projection, "vector": 1},
+    ))
+    tracks = packed + legacy
+    return tracks, track_matrix(tracks)
+
+
+def migrate(db: MongoClient, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """Add packed vectors to every track that lacks a current one.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+        batch_size (int): Updates per bulk write. Defaults to MIGRATION_BATCH_SIZE.
+
+    Returns:
+        int: Number of migrated tracks.
+    """
+    migrated = 0
+    updates: List[UpdateOne] = []
+    cursor = db.tracks.find(
+        {"vector": {"$exists": True}, "vector_schema": {"$ne": VECTOR_SCHEMA_VERSION}},
+        {"vector": 1},
+        batch_size=batch_size,
+    )
+    for track in cursor:
+        updates.append(UpdateOne({"_id": track["_id"]}, {"$set": vector_fields(track["vector"])}))
+        if len(updates) == batch_size:
+            migrated += db.tracks.bulk_write(updates, ordered=False).modified_count
+            updates = []
+    if updates:
+        migrated += db.tracks.bulk_write(updates, ordered=False).modified_count
+    return migrated
+
+
+if __name__ == "__main__":
+    try:
+        from song_details_calc import get_db_connection
+    except ImportError:
+        from mood_estimators.song_details_calc import get_db_connection
+
+    print(f"Migrated {migrate(get_db_connection())} track vectors to schema {VECTOR_SCHEMA_VERSION}")
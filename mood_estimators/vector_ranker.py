@@ -0,0 +1,114 @@
+import numpy as np
+from typing import List, Dict, Any, Sequence, Tuple
+
+try:
+    import vector_codec
+except ImportError:
+    from mood_estimators import vector_codec
+
+# Order of the mood vector dimensions: the layout of the current packed vector schema
+VECTOR_DIMENSIONS: Tuple[str, ...] = vector_codec.VECTOR_SCHEMAS[vector_codec.VECTOR_SCHEMA_VERSION]
+
+QUADRANTS: Tuple[str, ...] = ("happy", "sad", "chill", "stressing")
+
+# Similarities are rounded before ranking, matching the original per-track loop
+SIMILARITY_DECIMALS: int = 4
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale every row of a matrix to unit length.
+
+    Rows with zero magnitude are left as zeros so they score 0 against everything.
+
+    Args:
+        matrix (np.ndarray): Matrix of row vectors.
+
+    Returns:
+        np.ndarray: Row-normalized float32 matrix.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def centroid_scores(track_matrix: np.ndarray, centroids: Dict[str, np.ndarray]) -> np.ndarray:
+    """Average cosine similarity of every track against the standard songs of each quadrant.
+
+    Args:
+        track_matrix (np.ndarray): Track vectors, shape (N, D).
+        centroids (Dict[str, np.ndarray]): Mean normalized standard-song vector per quadrant,
+            as returned by centroid_store.load_centroids.
+
+    Returns:
+        np.ndarray: Similarities of shape (N, len(QUADRANTS)), columns ordered as QUADRANTS.
+    """
+    centroid_matrix = np.stack([np.asarray(centroids[quadrant], dtype=np.float32) for quadrant in QUADRANTS])
+    return normalize_rows(track_matrix) @ centroid_matrix.T
+
+
+def group_scores(scores: np.ndarray, group: Sequence[str]) -> np.ndarray:
+    """Select and round the quadrant columns requested by an emotion group.
+
+    Args:
+        scores (np.ndarray): Quadrant similarities, shape (N, len(QUADRANTS)).
+        group (Sequence[str]): Emotions in ranking priority order.
+
+    Returns:
+        np.ndarray: Rounded similarities of shape (N, len(group)).
+    """
+    columns = [QUADRANTS.index(emotion) for emotion in group]
+    return np.round(scores[:, columns], SIMILARITY_DECIMALS)
+
+
+def top_k_indices(ranks: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best rows, ordered lexicographically by column (first column first).
+
+    A partial sort on the first column picks the candidates; only those are fully sorted.
+
+    Args:
+        ranks (np.ndarray): Rank keys, shape (N, G).
+        k (int): Number of rows to return.
+
+    Returns:
+        np.ndarray: Row indices, best first.
+    """
+    n = ranks.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+
+    candidates = np.arange(n)
+    if k < n:
+        primary = ranks[:, 0]
+        threshold = np.partition(primary, n - k)[n - k]
+        candidates = np.flatnonzero(primary >= threshold)
+
+    # lexsort sorts by the last key first, so feed the columns in reverse
+    keys = ranks[candidates].T[::-1]
+    order = np.lexsort(keys)[::-1]
+    return candidates[order[:k]]
+
+
+def rank_tracks(tracks: List[Dict[str, Any]], track_matrix: np.ndarray, centroids: Dict[str, np.ndarray], group: List[str], numReturned: int = 500) -> List[Dict[str, str]]:
+    """Rank tracks against the standard-song centroid of each emotion in a group.
+
+    Args:
+        tracks (List[Dict[str, Any]]): Track documents with "spotify", "track_name" and "artist_name".
+        track_matrix (np.ndarray): Vector of every track, as returned by vector_codec.track_matrix.
+        centroids (Dict[str, np.ndarray]): Centroid per quadrant, as returned by centroid_store.load_centroids.
+        group (List[str]): Emotions in ranking priority order.
+        numReturned (int): Number of top songs to return. Defaults to 500.
+
+    Returns:
+        List[Dict[str, str]]: Top songs, best first.
+    """
+    ranks = group_scores(centroid_scores(track_matrix, centroids), group)
+
+    return [
+        {
+            "track_id": tracks[i]["spotify"]["track_id"],
+            "track_name": tracks[i]["track_name"],
+            "artist_name": tracks[i]["artist_name"],
+        }
+        for i in top_k_indices(ranks, numReturned)
+    ]
@@ -0,0 +1,109 @@
+import glob
+import json
+import os
+import time
+from typing import Dict, Any, Union
+import numpy as np
+from pymongo import MongoClient
+
+try:
+    from catalog_index import CatalogIndex
+except ImportError:
+    from mood_estimators.catalog_index import CatalogIndex
+
+DEFAULT_SNAPSHOT_DIRECTORY: str = "mood_estimators/snapshot"
+# Names the vector and score files of the current snapshot and holds the id/name sidecar
+MANIFEST_FILE: str = "manifest.json"
+
+
+def export_snapshot(db: MongoClient, directory: str = DEFAULT_SNAPSHOT_DIRECTORY) -> CatalogIndex:
+    """Write the catalog's vector matrix, its quadrant scores and the id/name manifest to disk.
+
+    Every export writes its arrays under new file names, then swaps in the manifest that
+    names them. Readers go through the manifest, so they see either the old snapshot or the
+    new one, never vectors and metadata from different exports. Arrays no longer named by
+    the manifest are removed afterwards.
+
+    Args:
+        db (MongoClient): The MongoDB client.
+        directory (str): Snapshot directory. Defaults to DEFAULT_SNAPSHOT_DIRECTORY.
+
+    Returns:
+        CatalogIndex: The exported catalog.
+    """
+    index = CatalogIndex.from_db(db)
+    os.makedirs(directory, exist_ok=True)
+
+    generation = f"{index.catalog_version}-{time.time_ns()}"
+    files = {"vectors": f"vectors-{generation}.npy", "scores": f"scores-{generation}.npy"}
+    np.save(os.path.join(directory, files["vectors"]), index.matrix)
+    np.save(os.path.join(directory, files["scores"]), np.ascontiguousarray(index.scores, dtype=np.float32))
+
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    manifest: Dict[str, Any] = {
+        **files,
+        "catalog_version": index.catalog_version,
+        "centroids": {quadrant: centroid.tolist() for quadrant, centroid in index.centroids.items()},
+        "track_ids": index.track_ids,
+        "track_names": index.track_names,
+        "artist_names": index.artist_names,
+    }
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    # Processes that already mapped an old array keep their pages until they unmap it
+    for path in glob.glob(os.path.join(directory, "vectors-*.npy")) + glob.glob(os.path.join(directory, "scores-*.npy")):
+        if os.path.basename(path) not in files.values():
+            os.remove(path)
+    print(f"Exported {len(index)} track vectors to {directory}")
+    return index
+
+
+def load_snapshot(directory: str = DEFAULT_SNAPSHOT_DIRECTORY) -> Union[CatalogIndex, None]:
+    """Load a catalog snapshot, memory-mapping the vector matrix and its quadrant scores.
+
+    The pages are shared through the OS page cache by every process that maps them, and
+    nothing is computed over the matrix, so startup does not grow with the catalog.
+
+    Args:
+        directory (str): Snapshot directory. Defaults to DEFAULT_SNAPSHOT_DIRECTORY.
+
+    Returns:
+        CatalogIndex | None: The snapshot catalog, or None if no usable snapshot exists.
+    """
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    try:
+        matrix = np.load(os.path.join(directory, manifest["vectors"]), mmap_mode="r")
+        scores = np.load(os.path.join(directory, manifest["scores"]), mmap_mode="r")
+    except (KeyError, FileNotFoundError):
+        # An export replaced the manifest while it was read; the next start picks up the new one
+        print(f"Snapshot in {directory} is incomplete, ignoring it")
+        return None
+    if not matrix.shape[0] == scores.shape[0] == len(manifest["track_ids"]):
+        print(f"Snapshot in {directory} is inconsistent, ignoring it")
+        return None
+
+    return CatalogIndex(
+        manifest["track_ids"],
+        manifest["track_names"],
+        manifest["artist_names"],
+        matrix,
+        {quadrant: np.array(centroid, dtype=np.float32) for quadrant, centroid in manifest["centroids"].items()},
+        manifest["catalog_version"],
+        scores,
+    )
+
+
+if __name__ == "__main__":
+    try:
+        from song_details_calc import get_db_connection
+    except ImportError:
+        from mood_estimators.song_details_calc import get_db_connection
+
+    export_snapshot(get_db_connection())
@@ -0,0 +1,73 @@
+import pathlib
+import sys
+from typing import Any, Dict, List
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+from mood_estimators import bertai
+from mood_estimators.line_cache import LineCache
+
+
+class StubClassifier:
+    """Stands in for the poems-sentiment pipeline, labelling lines by keyword and recording every input."""
+
+    def __init__(self):
+        self.seen: List[str] = []
+
+    def __call__(self, lines: List[str], batch_size: int) -> List[Dict[str, Any]]:
+        self.seen.extend(lines)
+        return [{"label": "negative" if "cries" in line.lower() else "positive", "score": 0.9} for line in lines]
+
+
+@pytest.fixture
+def classifier(monkeypatch) -> StubClassifier:
+    stub = StubClassifier()
+    monkeypatch.setattr(bertai.registry, "get", lambda name: stub)
+    monkeypatch.setattr(bertai, "get_line_cache", lambda: None)
+    return stub
+
+
+def test_repeated_lines_are_classified_once(classifier):
+    lines = ["Hold on", "Everybody cries", "Hold on", "Hold on"]
+
+    results = bertai.classify_lines(lines)
+
+    assert sorted(classifier.seen) == ["Everybody cries", "Hold on"]
+    assert [label for label, _ in results] == ["positive", "negative", "positive", "positive"]
+
+
+def test_lines_that_normalize_alike_share_one_classification(classifier):
+    lines = ["Hold on", "  hold   ON ", "HOLD\ton"]
+
+    results = bertai.classify_lines(lines)
+
+    assert classifier.seen == ["Hold on"]
+    assert results == [("positive", 0.9)] * 3
+
+
+def test_repeats_keep_their_weight_in_the_percentages(classifier):
+    moods = bertai.get_lyrics_moods(["Hold on\nhold on\nHold on\nEverybody cries"])
+
+    assert moods == [{"positive_percentage": 0.75, "negative_percentage": 0.25, "mixed_percentage": 0.0, "no_impact_percentage": 0.0}]
+
+
+def test_empty_lyrics_get_zero_percentages(classifier):
+    moods = bertai.get_lyrics_moods(["", "  \n\n ", "Everybody cries"])
+
+    zeros = {"positive_percentage": 0.0, "negative_percentage": 0.0, "mixed_percentage": 0.0, "no_impact_percentage": 0.0}
+    assert moods[:2] == [zeros, zeros]
+    assert moods[2]["negative_percentage"] == 1.0
+    assert classifier.seen == ["Everybody cries"]
+
+
+def test_cached_lines_skip_the_model(classifier, monkeypatch, tmp_path):
+    cache = LineCache(str(tmp_path / "lines.sqlite"), "stub@torch:main")
+    monkeypatch.setattr(bertai, "get_line_cache", lambda: cache)
+
+    bertai.classify_lines(["Hold on", "Everybody cries"])
+    results = bertai.classify_lines(["hold on", "Push me to the edge"])
+
+    assert classifier.seen == ["Hold on", "Everybody cries", "Push me to the edge"]
+    assert results == [("positive", 0.9), ("positive", 0.9)]
+    cache.close()
@@ -0,0 +1,57 @@
+import asyncio
+import pathlib
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+from api.compute_executor import ComputeExecutor, ExecutorSaturated
+from api.jobs import JobQueue
+
+
+def fill(executor: ComputeExecutor, release: threading.Event) -> None:
+    for _ in range(executor.max_workers + executor.max_queue):
+        executor.submit(release.wait)
+
+
+def wait_for(job_queue: JobQueue, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_queue.status(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_run_rejects_when_saturated():
+    executor = ComputeExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    fill(executor, release)
+
+    with pytest.raises(ExecutorSaturated):
+        asyncio.run(executor.run(lambda: "result"))
+    assert executor.stats()["rejected"] == 1
+    release.set()
+    executor.shutdown()
+
+
+def test_queued_job_waits_for_a_saturated_executor():
+    executor = ComputeExecutor(max_workers=1, max_queue=1)
+    job_queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    fill(executor, release)
+
+    queued = job_queue.submit("key", lambda: executor.call(lambda: "result"))
+    time.sleep(0.05)
+    assert job_queue.status(queued["job_id"])["status"] == "running"
+    release.set()
+
+    job = wait_for(job_queue, queued["job_id"])
+    assert job["status"] == "done"
+    assert job["result"] == "result"
+    assert executor.stats()["rejected"] == 0
+    job_queue.shutdown()
+    executor.shutdown()
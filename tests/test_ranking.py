@@ -0,0 +1,77 @@
+import pathlib
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+from mood_estimators import vector_ranker
+from mood_estimators.centroid_store import compute_centroids
+from mood_estimators.max_heap import MaxHeap
+from mood_estimators.sharded_ranker import ShardedRanker
+
+GROUP: List[str] = ["happy", "chill", "happy", "sad"]
+STANDARD_SONGS_PER_QUADRANT: int = 5
+
+
+def seeded_catalog(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dimensions = len(vector_ranker.VECTOR_DIMENSIONS)
+    matrix = rng.normal(size=(n, dimensions)).astype(np.float32)
+    standard = {
+        quadrant: rng.normal(size=(STANDARD_SONGS_PER_QUADRANT, dimensions)).astype(np.float32)
+        for quadrant in vector_ranker.QUADRANTS
+    }
+    return matrix, standard
+
+
+def baseline_order(matrix: np.ndarray, standard: Dict[str, np.ndarray], k: int) -> List[int]:
+    """Rows in the order of the original loop: average cosine similarity per emotion pushed through a MaxHeap."""
+    heap = MaxHeap()
+    for i, vector in enumerate(matrix.astype(np.float64)):
+        rank = []
+        for emotion in GROUP:
+            songs = standard[emotion].astype(np.float64)
+            similarities = songs @ vector / (np.linalg.norm(songs, axis=1) * np.linalg.norm(vector))
+            rank.append(round(float(similarities.mean()), 4))
+        heap.insert((rank[0], rank[1], rank[2], rank[3], i))
+    return [heap.extract_max()[-1] for _ in range(min(k, len(matrix)))]
+
+
+def test_rank_tracks_matches_max_heap_baseline():
+    matrix, standard = seeded_catalog(2000)
+    standard_matrix = np.concatenate([standard[quadrant] for quadrant in vector_ranker.QUADRANTS])
+    centroids = compute_centroids(standard_matrix, np.repeat(vector_ranker.QUADRANTS, STANDARD_SONGS_PER_QUADRANT))
+    tracks = [{"spotify": {"track_id": str(i)}, "track_name": f"track {i}", "artist_name": f"artist {i}"} for i in range(len(matrix))]
+
+    ranked = vector_ranker.rank_tracks(tracks, matrix, centroids, GROUP, 100)
+
+    assert [int(track["track_id"]) for track in ranked] == baseline_order(matrix, standard, 100)
+
+
+def test_rank_tracks_returns_whole_catalog_when_k_exceeds_it():
+    matrix, standard = seeded_catalog(30)
+    standard_matrix = np.concatenate([standard[quadrant] for quadrant in vector_ranker.QUADRANTS])
+    centroids = compute_centroids(standard_matrix, np.repeat(vector_ranker.QUADRANTS, STANDARD_SONGS_PER_QUADRANT))
+    tracks = [{"spotify": {"track_id": str(i)}, "track_name": "", "artist_name": ""} for i in range(len(matrix))]
+
+    ranked = vector_ranker.rank_tracks(tracks, matrix, centroids, GROUP, 500)
+
+    assert [int(track["track_id"]) for track in ranked] == baseline_order(matrix, standard, 500)
+
+
+def test_sharded_ranker_matches_single_process():
+    matrix, standard = seeded_catalog(5000, seed=1)
+    standard_matrix = np.concatenate([standard[quadrant] for quadrant in vector_ranker.QUADRANTS])
+    centroids = compute_centroids(standard_matrix, np.repeat(vector_ranker.QUADRANTS, STANDARD_SONGS_PER_QUADRANT))
+    scores = vector_ranker.centroid_scores(matrix, centroids)
+    # Coarse keys force ties across shard boundaries
+    scores = np.round(scores, 1)
+
+    sharded = ShardedRanker(scores, workers=3)
+    try:
+        for group, k in [(GROUP, 200), (["sad", "stressing", "sad", "chill"], 7), (GROUP, 10_000)]:
+            expected = vector_ranker.top_k_indices(vector_ranker.group_scores(scores, group), k)
+            np.testing.assert_array_equal(sharded.top_k(group, k), expected)
+    finally:
+        sharded.close()
@@ -0,0 +1,149 @@
+import pathlib
+import sys
+import threading
+from typing import Any, Dict, List
+
+import pytest
+import requests
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+from api import spotify_writer
+from api.spotify_writer import SpotifyWriter, MAX_ITEMS_PER_REQUEST
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: Any = None, headers: Dict[str, str] = {}):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers
+        self.content = b"{}" if body is not None else b""
+
+    def json(self) -> Any:
+        return self.body
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error", response=self)
+
+
+class FakeSession:
+    """Stands in for requests.Session, answering from a queue of scripted replies per path."""
+
+    def __init__(self, replies: Dict[str, List[Any]] = {}):
+        self.replies = {path: list(queue) for path, queue in replies.items()}
+        self.calls: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+    def request(self, method: str, url: str, headers: Dict[str, str], json: Any, timeout: float) -> FakeResponse:
+        path = url.split("/v1/", 1)[1]
+        with self.lock:
+            self.calls.append({"method": method, "path": path, "json": json})
+            queue = self.replies.get(path)
+            reply = queue.pop(0) if queue else None
+        if isinstance(reply, Exception):
+            raise reply
+        if reply is not None:
+            return reply
+        if path == "me":
+            return FakeResponse(200, {"id": "user"})
+        if path.startswith("users/"):
+            return FakeResponse(201, {"id": "playlist"})
+        return FakeResponse(201, {"snapshot_id": "snapshot"})
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> List[float]:
+    recorded: List[float] = []
+    monkeypatch.setattr(spotify_writer.time, "sleep", recorded.append)
+    return recorded
+
+
+def make_writer(session: FakeSession) -> SpotifyWriter:
+    writer = SpotifyWriter("https://spotify.test/v1", backoff_seconds=0.5)
+    writer.session = session
+    return writer
+
+
+def added_uris(session: FakeSession) -> List[List[str]]:
+    return [call["json"]["uris"] for call in session.calls if call["path"] == "playlists/playlist/items"]
+
+
+def test_add_tracks_splits_into_chunks_of_100():
+    session = FakeSession()
+    writer = make_writer(session)
+    track_ids = [f"{i:022d}" for i in range(250)]
+
+    writer.add_tracks("token", "playlist", track_ids, keep_order=True)
+
+    chunks = added_uris(session)
+    assert [len(chunk) for chunk in chunks] == [MAX_ITEMS_PER_REQUEST, MAX_ITEMS_PER_REQUEST, 50]
+    assert [uri for chunk in chunks for uri in chunk] == [f"spotify:track:{track_id}" for track_id in track_ids]
+    writer.close()
+
+
+def test_concurrent_chunks_add_every_track_once():
+    session = FakeSession()
+    writer = make_writer(session)
+    track_ids = [f"{i:022d}" for i in range(1001)]
+
+    writer.add_tracks("token", "playlist", track_ids)
+
+    chunks = added_uris(session)
+    assert len(chunks) == 11
+    assert all(len(chunk) <= MAX_ITEMS_PER_REQUEST for chunk in chunks)
+    assert sorted(uri for chunk in chunks for uri in chunk) == sorted(f"spotify:track:{track_id}" for track_id in track_ids)
+    writer.close()
+
+
+def test_rate_limit_waits_for_retry_after(sleeps):
+    session = FakeSession({"playlists/playlist/items": [FakeResponse(429, {}, {"Retry-After": "3"})]})
+    writer = make_writer(session)
+
+    writer.add_tracks("token", "playlist", ["a"], keep_order=True)
+
+    assert sleeps == [3.0]
+    assert added_uris(session) == [["spotify:track:a"], ["spotify:track:a"]]
+    writer.close()
+
+
+def test_server_error_backs_off_exponentially(sleeps):
+    session = FakeSession({"users/user/playlists": [FakeResponse(503, {}), FakeResponse(502, {})]})
+    writer = make_writer(session)
+
+    assert writer.create_playlist("token", "name") == "playlist"
+    assert sleeps == [0.5, 1.0]
+    writer.close()
+
+
+def test_gives_up_after_retries(sleeps):
+    session = FakeSession({"playlists/playlist/items": [FakeResponse(429, {})] * 4})
+    writer = make_writer(session)
+
+    with pytest.raises(requests.HTTPError):
+        writer.add_tracks("token", "playlist", ["a"], keep_order=True)
+    assert len(added_uris(session)) == 4
+    writer.close()
+
+
+@pytest.mark.parametrize("error", [requests.ReadTimeout("timed out"), requests.ConnectionError("connection dropped")])
+def test_post_without_response_is_not_retried(sleeps, error):
+    session = FakeSession({"users/user/playlists": [error]})
+    writer = make_writer(session)
+
+    with pytest.raises(type(error)):
+        writer.create_playlist("token", "name")
+    assert [call["path"] for call in session.calls].count("users/user/playlists") == 1
+    assert sleeps == []
+    writer.close()
+
+
+def test_get_timeout_is_retried(sleeps):
+    session = FakeSession({"me": [requests.ReadTimeout("timed out")]})
+    writer = make_writer(session)
+
+    assert writer.user_id("token") == "user"
+    assert [call["path"] for call in session.calls] == ["me", "me"]
+    writer.close()